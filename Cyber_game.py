@@ -1,14 +1,35 @@
+import gc
+import os
 import sys
 import time
-import random
 import webbrowser
 from pathlib import Path
 
+# Taken before the heavy imports so the startup report includes them
+STARTUP_T0 = time.perf_counter()
+
 import pygame
-import requests
 
-pygame.init()
+from assets import AssetManager
+from dirty_renderer import DirtyRectRenderer
+from frame_profiler import FrameProfiler
+from input_buffer import InputBuffer
+from level_data import LevelSet
+from mem_profiler import MemoryProfiler
+from quality_governor import QualityGovernor
+from replay import ReplayRecorder
+from scaled_display import ScaledDisplay
+from score_client import ScoreSubmitter
+from simulation import BASE_H, BASE_W, GROUND_H, NO_INPUT, TICK_HZ, GameState
+from solid_sprites import SolidSprites
+from text_cache import DigitAtlas, TextCache
+
+# Only what the first frame needs; the mixer is opened later (see AUDIO)
+startup_times = [("imports", time.perf_counter())]
+pygame.display.init()
+pygame.font.init()
 pygame.joystick.init()
+startup_times.append(("pygame init", time.perf_counter()))
 
 # -------------------------------
 # NES CONTROLLER MAPPING (confirmed)
@@ -32,16 +53,54 @@ if pygame.joystick.get_count() > 0:
 else:
     print("No controller detected (keyboard still works).")
 
+# Gameplay input comes from key / button events rather than polling, so taps
+# shorter than a frame still count and a jump needs a fresh press
+input_buffer = InputBuffer(
+    keys={"left": [pygame.K_LEFT], "right": [pygame.K_RIGHT],
+          "jump": [pygame.K_UP], "attack": [pygame.K_SPACE]},
+    buttons={"left": [DPAD_LEFT_BTN], "right": [DPAD_RIGHT_BTN], "jump": [DPAD_UP_BTN],
+             "attack": [BTN_A], "start": [BTN_START, BTN_SELECT]},
+)
+
 
 # ---------------------------------------------------------------------
 # BASIC SETUP
 # ---------------------------------------------------------------------
-screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)  # windowed for debugging
-WIDTH, HEIGHT = screen.get_size()
+display = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)  # windowed for debugging
 pygame.display.set_caption("WASK")
 clock = pygame.time.Clock()
+startup_times.append(("display", time.perf_counter()))
+
+# WASK_RENDER=native (default) draws at the display's own resolution.
+# scaled / smooth / integer draw at BASE_W x BASE_H and scale each finished
+# frame to the display in one blit, which is far cheaper on 4K screens.
+view = ScaledDisplay(display, (BASE_W, BASE_H), os.environ.get("WASK_RENDER", "native"))
+screen = view.surface
+WIDTH, HEIGHT = screen.get_size()
+
+# Gameplay only redraws the areas that changed (set WASK_DIRTY_RECTS=0 to
+# always redraw and flip the full screen). Fixed-resolution modes rescale the
+# whole frame anyway, so they always redraw it.
+DIRTY_RECT_RENDERING = os.environ.get("WASK_DIRTY_RECTS", "1") != "0" and not view.fixed
+dirty = DirtyRectRenderer(screen)
+
+# Frame-phase profiler: F3 toggles the overlay (WASK_PROFILE=1 starts with it
+# on); WASK_PROFILE_TRACE=trace.csv or trace.json writes per-frame timings
+profiler = FrameProfiler(enabled=os.environ.get("WASK_PROFILE") == "1",
+                         trace_path=os.environ.get("WASK_PROFILE_TRACE") or None)
+
+# Kiosk memory check: WASK_MEMPROFILE=<dir> traces allocations and writes a
+# report at every run start and every WASK_MEMPROFILE_INTERVAL seconds
+memprof = None
+if os.environ.get("WASK_MEMPROFILE"):
+    memprof = MemoryProfiler(os.environ["WASK_MEMPROFILE"],
+                             interval=float(os.environ.get("WASK_MEMPROFILE_INTERVAL", "300")))
+
+# Fixed simulation timestep: physics always advances in 1/60 s ticks no matter
+# how fast frames are drawn, and run times are counted in ticks.
+TICK_MS = 1000.0 / TICK_HZ
+MAX_TICKS_PER_FRAME = 5   # beyond this we drop time rather than spiral
 
-BASE_W, BASE_H = 800, 500
 Sx = WIDTH / BASE_W
 Sy = HEIGHT / BASE_H
 S = min(Sx, Sy)
@@ -50,15 +109,8 @@ def sx(v): return int(v * Sx)
 def sy(v): return int(v * Sy)
 def ss(v): return int(v * S)
 
-GROUND_H = 40
 GROUND_Y = HEIGHT - ss(GROUND_H)
 
-# Fonts
-FONT_XL = pygame.font.SysFont("Arial", max(24, int(HEIGHT * 0.12)))
-FONT_LG = pygame.font.SysFont("Arial", max(20, int(HEIGHT * 0.08)))
-FONT_MD = pygame.font.SysFont("Arial", max(16, int(HEIGHT * 0.05)))
-FONT_SM = pygame.font.SysFont("Arial", max(12, int(HEIGHT * 0.035)))
-
 # Colours
 BLACK  = (0, 0, 0)
 WHITE  = (255, 255, 255)
@@ -74,14 +126,17 @@ HAZARD_COLOR = (255, 120, 120)
 # ---------------------------------------------------------------------
 # MUSIC (optional)
 # ---------------------------------------------------------------------
+# Opening the audio device can take a while, so the mixer is only started,
+# on the asset thread, once the first frame is on screen.
 muted = False
-try:
-    pygame.mixer.init()
-except Exception:
-    pass
+MUSIC_RATE = 44100
+music_playing = False
 
 def load_music():
-    if not pygame.mixer.get_init():
+    """Open the mixer and load the soundtrack; False if there is no audio"""
+    try:
+        pygame.mixer.init(frequency=MUSIC_RATE)
+    except Exception:
         return False
     for p in [
         Path.cwd() / "Background.beat.wav",
@@ -103,156 +158,95 @@ def set_music_volume(duck=False):
     else:
         pygame.mixer.music.set_volume(0.25 if duck else 0.6)
 
-if load_music():
-    set_music_volume(False)
-    pygame.mixer.music.play(-1)
-
 # ---------------------------------------------------------------------
-# BACKGROUND IMAGE (LEVEL 2)
+# ASSETS (fonts, music and images load in the background)
 # ---------------------------------------------------------------------
-background2 = None
-try:
-    img = pygame.image.load("background_1.jpg").convert()
-    background2 = pygame.transform.scale(img, (WIDTH, HEIGHT))
-    print("Loaded background_1.jpg")
-except Exception as e:
-    print("Could not load background_1.jpg:", e)
+assets = AssetManager()
+
+# Font sizes as (share of screen height, minimum)
+FONT_SIZES = {"font_xl": (0.12, 24), "font_lg": (0.08, 20), "font_md": (0.05, 16), "font_sm": (0.035, 12)}
+
+def load_font(name):
+    # The font file is looked up once and cached instead of SysFont scanning
+    # every installed font on each start
+    share, minimum = FONT_SIZES[name]
+    return pygame.font.Font(assets.resolve_font("Arial"), max(minimum, int(HEIGHT * share)))
+
+for _name in FONT_SIZES:
+    assets.add(_name, lambda name=_name: load_font(name))
+assets.add("music", load_music, lazy=True)
+
+# Level art loads lazily: each level load asks for the current and next level's
+# backgrounds (see level_background()).
+assets.add_image("platform1", "platform_1.jpg", lazy=True)   # not used by any level yet
+
+def show_loading_screen():
+    """Progress bar until the eager assets are in; uses only the built-in font"""
+    font = pygame.font.Font(None, max(24, int(HEIGHT * 0.06)))
+    bw, bh = int(WIDTH * 0.4), max(8, int(HEIGHT * 0.03))
+    bar = pygame.Rect(WIDTH // 2 - bw // 2, int(HEIGHT * 0.55), bw, bh)
+    # Nothing is drawn at all if the assets are in within one loading frame
+    while not assets.wait(1 / 30):
+        for ev in pygame.event.get():
+            if ev.type == pygame.QUIT or (ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE):
+                pygame.quit()
+                sys.exit()
+        loaded, total = assets.progress()
+        screen.fill(BLACK)
+        title = font.render("Loading…", True, WHITE)
+        screen.blit(title, (WIDTH // 2 - title.get_width() // 2, int(HEIGHT * 0.45)))
+        pygame.draw.rect(screen, GRAY, bar)
+        pygame.draw.rect(screen, GREEN, (bar.x, bar.y, bar.width * loaded // max(1, total), bar.height))
+        view.present()
 
-# ---------------------------------------------------------------------
-# PLAYER & MOVEMENT
-# ---------------------------------------------------------------------
-PLAYER_W, PLAYER_H = 40, 50
-player = pygame.Rect(sx(60), sy(BASE_H - 100), ss(PLAYER_W), ss(PLAYER_H))
-
-player_vel_y = 0.0
-player_on_ground = False
-can_double_jump = True
-facing = 1
-lives = 3
-
-MOVE_SPEED = ss(5)
-GRAVITY    = 0.6 * S
-JUMP_FORCE = -16 * S
-
-# Shooting
-ATTACK_COOLDOWN = 1000  # ms
-ATTACK_RANGE    = ss(220)
-BULLET_SPEED    = ss(10)
-BULLET_SIZE     = (ss(10), ss(5))
-projectiles = []   # (rect, dir, dist)
-next_shot_time = 0
-
-# Walls
-LEFT_WALL  = pygame.Rect(0, 0, ss(12), GROUND_Y)
-RIGHT_WALL = pygame.Rect(WIDTH - ss(12), 0, ss(12), GROUND_Y)
+assets.start()
+show_loading_screen()
+startup_times.append(("fonts", time.perf_counter()))
+
+# Fonts
+FONT_XL = assets.get("font_xl")
+FONT_LG = assets.get("font_lg")
+FONT_MD = assets.get("font_md")
+FONT_SM = assets.get("font_sm")
+
+# Rendered text is cached; the run timer is built from pre-rendered digits
+text_cache = TextCache()
+timer_digits = DigitAtlas(FONT_SM, WHITE)
+# Enemies and bullets are drawn as batched blits of cached solid surfaces
+solid_sprites = SolidSprites()
 
 # ---------------------------------------------------------------------
-# LEVEL DEFINITIONS
+# LEVELS & SIMULATION
 # ---------------------------------------------------------------------
-LEVELS_BASE = [
-    {   # LEVEL 1
-        "spawn": (60, BASE_H - 100),
-        "enemies": [
-            (400, BASE_H - 90, 350, 500),
-        ],
-        "platforms": [],
-        "collectibles": [
-            (600, BASE_H - 120),
-        ],
-        "boss": None,
-    },
-    {   # LEVEL 2 – belts as platforms
-        "spawn": (60, BASE_H - 100),
-        "enemies": [
-            (300, BASE_H - 90, 250, 500),
-            (600, BASE_H - 90, 550, 750),
-        ],
-        # These rects line up with the BELTS in the background art
-        "platforms": [
-            (170, 292, 320, 40),  # LOWER belt
-            (470, 215, 320, 40),  # UPPER belt
-        ],
-        "collectibles": [
-            (170 + 150, 292 - 26),  # above lower belt
-            (470 + 150, 215 - 26),  # above upper belt
-        ],
-        "boss": None,
-    },
-    {   # LEVEL 3 – BOSS
-        "spawn": (80, BASE_H - 100),
-        "enemies": [],
-        "platforms": [],
-        "collectibles": [],
-        "boss": {
-            "hp": 12,
-            "jump_power": -14,
-            "gravity": 0.7,
-            "speed_x": 4,
-            "air_hover_ms": 1000,    # 1s hover
-            "land_cooldown_ms": 2000,  # 2s on ground
-            "touch_damage": True,
-        },
-    },
-]
-
-def build_levels():
-    levels = []
-    for L in LEVELS_BASE:
-        lvl = {}
-        lvl["spawn"] = (sx(L["spawn"][0]), sy(L["spawn"][1]))
-
-        # enemies
-        enemy_list = []
-        for ex, ey, lo, hi in L["enemies"]:
-            rect = pygame.Rect(sx(ex), sy(ey), ss(40), ss(40))
-            enemy_list.append((rect, sx(lo), sx(hi)))
-        lvl["enemies"] = enemy_list
-
-        # platforms
-        plat_list = []
-        for x, y, w, h in L["platforms"]:
-            plat_list.append(pygame.Rect(sx(x), sy(y), sx(w), sy(h)))
-        lvl["platforms"] = plat_list
-
-        # collectibles
-        coll_list = []
-        for x, y in L["collectibles"]:
-            coll_list.append(pygame.Rect(sx(x), sy(y), ss(20), ss(20)))
-        lvl["collectibles"] = coll_list
-
-        # boss config
-        if L["boss"]:
-            cfg = dict(L["boss"])
-            cfg["jump_power"] *= S
-            cfg["gravity"]    *= S
-            cfg["speed_x"]    *= S
-            lvl["boss_cfg"] = cfg
-        else:
-            lvl["boss_cfg"] = None
-
-        levels.append(lvl)
-    return levels
-
-levels = build_levels()
-level_index = 0
-
-# runtime state
-enemies = []
-enemy_dirs = []
-enemy_alive = []
-platforms = []
-collectibles = []
-collected = []
-portal = None
-
-# boss state
-boss = None
-boss_hp = 0
-boss_vx = 0.0
-boss_vy = 0.0
-boss_state = "ground"
-boss_next_time = 0
-hazards = []   # list of {"rect":..., "dir":-1/1, "speed":..., "life":...}
+# Levels are JSON files in levels/ (base 800x500 coordinates), loaded and
+# scaled on demand with the scaled geometry cached per resolution.
+levels = LevelSet((WIDTH, HEIGHT), (Sx, Sy, S))
+
+# Full-screen level backgrounds can be turned off by the quality governor
+level_backgrounds = True
+
+def level_background(idx):
+    """Asset name of a level's full-screen background (registering it), or None"""
+    filename = levels[idx]["background"]
+    if filename is None or not level_backgrounds:
+        return None
+    name = f"{filename}@{WIDTH}x{HEIGHT}"
+    if name not in assets:
+        assets.add_image(name, filename, (WIDTH, HEIGHT), lazy=True)
+    return name
+
+# Everything that happens during a run (player, enemies, boss, questions, run
+# clock) lives in a GameState from simulation.py. This file turns input into
+# sim.step() calls and draws the result; each run gets a fresh GameState.
+sim = GameState((WIDTH, HEIGHT), levels)
+
+# Every run is recorded (inputs, answers, RNG seed) so it can be replayed
+# exactly; finished runs are saved to REPLAY_DIR
+REPLAY_DIR = Path(os.environ.get("WASK_REPLAY_DIR") or Path(__file__).parent / "replays")
+LEVEL_CRC = levels.fingerprint()
+recorder = None
+last_replay = None
+runs_started = 0
 
 # game state
 game_state = "menu"
@@ -264,269 +258,101 @@ name_text = ""
 email_text = ""
 typing_name = True
 
-game_start_time = None
-run_finished = False
-final_time = None
-
-# Questions
-tf_questions = [
-    ("Your cell phone cannot be infected by malware.", False),
-    ("Two-factor authentication improves security.", True),
-    ("Using the same password everywhere is safe.", False),
-]
-
-mc_questions = [
-    ("Which is the BEST way to verify a suspicious email?",
-     ["Click the link", "Reply to sender", "Verify via official channel"], 2),
-    ("What does phishing try to do?",
-     ["Steal your information", "Improve battery life", "Clean malware"], 0),
-]
-
-q_text = None
-q_answers = []
-q_correct_idx = 0
-q_callback = None
+# Frame time (ms) not yet turned into simulation ticks
+tick_accumulator = 0.0
+
+# Answer buttons for the open question, laid out by draw_question()
 q_buttons = []
 # ---------------------------------------------------------------------
 # SERVER SUBMISSION
 # ---------------------------------------------------------------------
-def submit_result_to_server(name, email, time_s, outcome):
-   # url = "http://127.0.0.1:5000/submit_result"
-    url = "https://krish-leaderboard.onrender.com/submit_result"    
-    payload = {
-        "name": name or "Player",
-        "email": email or "",
-        "time_s": float(time_s),
-        "outcome": outcome,
-    }
-    try:
-        requests.post(url, json=payload, timeout=1.0)
-    except Exception:
-        pass
-
-# ---------------------------------------------------------------------
-# RESET LEVEL
-# ---------------------------------------------------------------------
-def reset_level(idx):
-    global enemies, enemy_dirs, enemy_alive
-    global platforms, collectibles, collected, portal
-    global boss, boss_hp, boss_vx, boss_vy, boss_state, boss_next_time, hazards
-    global player_vel_y, player_on_ground, can_double_jump
-
-    L = levels[idx]
-
-    player.topleft = L["spawn"]
-    player_vel_y = 0
-    player_on_ground = False
-    can_double_jump = True
-
-    enemies = [(e.copy(), lo, hi) for (e, lo, hi) in L["enemies"]]
-    enemy_dirs = [-1 for _ in enemies]
-    enemy_alive = [True for _ in enemies]
-
-    platforms   = [p.copy() for p in L["platforms"]]
-    collectibles = [c.copy() for c in L["collectibles"]]
-    collected   = [False for _ in collectibles]
-
-    portal = None
-
-    cfg = L["boss_cfg"]
-    boss = None
-    boss_hp = 0
-    boss_vx = boss_vy = 0.0
-    boss_state = "ground"
-    boss_next_time = pygame.time.get_ticks()
-    hazards = []
-
-    if cfg:
-        size = ss(100)
-        bx = WIDTH - size - ss(120)
-        by = GROUND_Y - size
-        boss = pygame.Rect(bx, by, size, size)
-        boss_hp = cfg["hp"]
-
-    # write back globals
-    globals().update({
-        "enemies": enemies,
-        "enemy_dirs": enemy_dirs,
-        "enemy_alive": enemy_alive,
-        "platforms": platforms,
-        "collectibles": collectibles,
-        "collected": collected,
-        "portal": portal,
-        "boss": boss,
-        "boss_hp": boss_hp,
-        "boss_vx": boss_vx,
-        "boss_vy": boss_vy,
-        "boss_state": boss_state,
-        "boss_next_time": boss_next_time,
-        "hazards": hazards
-    })
-
-# ---------------------------------------------------------------------
-# START RUN
-# ---------------------------------------------------------------------
-def start_run():
-    global level_index, lives, projectiles
-    global game_start_time, run_finished, final_time
-    level_index = 0
-    lives = 3
-    projectiles = []
-    game_start_time = time.time()
-    run_finished = False
-    final_time = None
-    reset_level(0)
+# SERVER_URL = "http://127.0.0.1:5000"
+SERVER_URL = "https://krish-leaderboard.onrender.com"
 
-# ---------------------------------------------------------------------
-# QUESTIONS
-# ---------------------------------------------------------------------
-def start_question(text, answers, correct_idx, callback):
-    global game_state, q_text, q_answers, q_correct_idx, q_callback, q_buttons
-    game_state = "question"
-    q_text = text
-    q_answers = answers
-    q_correct_idx = correct_idx
-    q_callback = callback
-    q_buttons = [pygame.Rect(0, 0, 0, 0) for _ in answers]
-    set_music_volume(True)
-
-def handle_answer(choice_index):
-    global game_state
-    correct = (choice_index == q_correct_idx)
-    if q_callback:
-        q_callback(correct)
-    game_state = "play"
-    set_music_volume(False)
-
-# ---------------------------------------------------------------------
-# SHOCKWAVES
-# ---------------------------------------------------------------------
-def spawn_shockwaves(x_center, y_bottom):
-    speed = ss(10)
-    life  = 35
-    h = ss(14)
-    hazards.append({
-        "rect": pygame.Rect(x_center, y_bottom - h, 1, h),
-        "dir": -1,
-        "speed": speed,
-        "life": life
-    })
-    hazards.append({
-        "rect": pygame.Rect(x_center, y_bottom - h, 1, h),
-        "dir":  1,
-        "speed": speed,
-        "life": life
-    })
-
-def update_hazards():
-    global hazards
-    new_list = []
-    for hz in hazards:
-        r = hz["rect"]
-        if hz["dir"] > 0:
-            r.width += hz["speed"]
-        else:
-            r.x -= hz["speed"]
-            r.width += hz["speed"]
-        hz["life"] -= 1
-        if player.colliderect(r):
-            damage_player()
-        if hz["life"] > 0 and r.width > 0:
-            new_list.append(hz)
-    hazards = new_list
+# Board (class / event / game version) this station submits to, from
+# WASK_BOARD; "main" is the original global leaderboard.
+LEADERBOARD_BOARD = os.environ.get("WASK_BOARD") or "main"
 
-# ---------------------------------------------------------------------
-# BOSS
-# ---------------------------------------------------------------------
-def update_boss():
-    global boss, boss_hp, boss_vx, boss_vy, boss_state, boss_next_time, projectiles, game_state
+# Results are posted from a background thread so the game never freezes
+submitter = ScoreSubmitter(SERVER_URL, LEADERBOARD_BOARD)
 
-    if boss is None:
-        return
+def submit_result_to_server(name, email, time_s, outcome):
+    # The run's replay goes along so the server can verify the time
+    submitter.submit(name, email, time_s, outcome, replay=last_replay)
 
-    cfg = levels[level_index]["boss_cfg"]
-    g = cfg["gravity"]
-    jump = cfg["jump_power"]
-    speed = cfg["speed_x"]
-    hover_ms = cfg["air_hover_ms"]
-    land_ms  = cfg["land_cooldown_ms"]
-
-    now = pygame.time.get_ticks()
-
-    if boss_state == "ground":
-        boss.bottom = GROUND_Y
-        boss_vy = 0
-        if now >= boss_next_time:
-            target_x = player.centerx
-            boss_vx = speed if boss.centerx < target_x else -speed
-            boss_vy = jump
-            boss_state = "takeoff"
-
-    elif boss_state == "takeoff":
-        boss_vy += g
-        boss_vx = speed if boss.centerx < player.centerx else -speed
-        boss.x += int(boss_vx)
-        boss.y += int(boss_vy)
-        if boss_vy >= 0:
-            boss_state = "hover"
-            boss_vx = 0
-            boss_vy = 0
-            boss_next_time = now + hover_ms
-
-    elif boss_state == "hover":
-        if now >= boss_next_time:
-            boss_state = "fall"
-            boss_vy = 16 * S
-            boss_vx = 0
-
-    elif boss_state == "fall":
-        boss_vy += g
-        boss.y += int(boss_vy)
-        if boss.bottom >= GROUND_Y:
-            boss.bottom = GROUND_Y
-            spawn_shockwaves(boss.centerx, boss.bottom)
-            boss_state = "ground"
-            boss_next_time = now + land_ms
-
-    # touch damage
-    if cfg["touch_damage"] and player.colliderect(boss):
-        damage_player()
-
-    # bullets vs boss
-    new_proj = []
-    for rect, d, dist in projectiles:
-        rect.x += int(d * BULLET_SPEED)
-        dist += BULLET_SPEED
-        if rect.colliderect(boss):
-            boss_hp -= 1
-        elif dist < ATTACK_RANGE:
-            new_proj.append((rect, d, dist))
-    projectiles = new_proj
-
-    if boss_hp <= 0:
-        hazards.clear()
-        game_state = "win"
+def draw_submit_status():
+    text = submitter.status_text()
+    if text:
+        t = text_cache.render(FONT_SM, text, WHITE)
+        screen.blit(t, (WIDTH // 2 - t.get_width() // 2, int(HEIGHT * 0.41)))
 
 # ---------------------------------------------------------------------
-# DAMAGE PLAYER
+# SIMULATION EVENTS
 # ---------------------------------------------------------------------
-def damage_player():
-    global lives
-    lives -= 1
-    reset_level(level_index)
+def handle_sim_events():
+    """React to what the simulation did: level art, music ducking, results"""
+    global q_buttons
+    for ev in sim.events:
+        if ev[0] == "level":
+            # Start fetching the next level's art, then bake (or fetch) this
+            # level's static layer now rather than mid-frame
+            idx = ev[1]
+            for i in (idx, idx + 1):
+                if i < len(levels) and level_background(i):
+                    assets.request(level_background(i))
+            get_level_layer(idx)
+        elif ev[0] == "question":
+            q_buttons = [pygame.Rect(0, 0, 0, 0) for _ in sim.q_answers]
+            set_music_volume(True)
+        elif ev[0] == "answered":
+            set_music_volume(False)
+        elif ev[0] == "finished":
+            _, outcome, time_s = ev
+            save_replay(outcome, time_s)
+            submit_result_to_server(player_name, player_email, time_s, outcome)
+    sim.events.clear()
+
+def save_replay(outcome, time_s):
+    global last_replay
+    last_replay = recorder.to_bytes()
+    path = REPLAY_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}_{outcome}_{time_s:.2f}s.wrpl"
+    try:
+        REPLAY_DIR.mkdir(exist_ok=True)
+        path.write_bytes(last_replay)
+    except OSError as e:
+        print("Could not save replay:", e)
+
+def start_run(level=0):
+    """Fresh simulation and replay recording; a respawn retries from `level`"""
+    global sim, recorder, runs_started
+    sim = GameState((WIDTH, HEIGHT), levels)
+    recorder = ReplayRecorder(sim, LEVEL_CRC)
+    recorder.start_run(level)
+    handle_sim_events()
+    runs_started += 1
+    if memprof:
+        memprof.snapshot(f"run {runs_started}")
+
+def lerp_rect(rect, prev_pos, alpha):
+    """Copy of rect placed between its previous and current position"""
+    if prev_pos is None or alpha <= 0:
+        return rect
+    x = prev_pos[0] + (rect.x - prev_pos[0]) * alpha
+    y = prev_pos[1] + (rect.y - prev_pos[1]) * alpha
+    return pygame.Rect(round(x), round(y), rect.width, rect.height)
 
 # ---------------------------------------------------------------------
 # DRAWING HELPERS
 # ---------------------------------------------------------------------
 def draw_button(rect, label, active=False):
     pygame.draw.rect(screen, WHITE if active else (220, 220, 220), rect, border_radius=10)
-    txt = FONT_MD.render(label, True, BLACK)
+    txt = text_cache.render(FONT_MD, label, BLACK)
     screen.blit(txt, (rect.centerx - txt.get_width() // 2,
                       rect.centery - txt.get_height() // 2))
 
 def draw_menu():
     screen.fill(BLACK)
-    title = FONT_XL.render("WASK", True, WHITE)
+    title = text_cache.render(FONT_XL, "WASK", WHITE)
     screen.blit(title, (WIDTH // 2 - title.get_width() // 2, int(HEIGHT * 0.2)))
 
     bw, bh = int(WIDTH * 0.22), int(HEIGHT * 0.08)
@@ -534,7 +360,7 @@ def draw_menu():
     board_rect = pygame.Rect(WIDTH // 2 - bw // 2, int(HEIGHT * 0.53), bw, bh)
     quit_rect  = pygame.Rect(WIDTH // 2 - bw // 2, int(HEIGHT * 0.66), bw, bh)
 
-    mx, my = pygame.mouse.get_pos()
+    mx, my = view.mouse_pos()
     draw_button(play_rect,  "Play",        play_rect.collidepoint(mx, my))
     draw_button(board_rect, "Leaderboard", board_rect.collidepoint(mx, my))
     draw_button(quit_rect,  "Quit",        quit_rect.collidepoint(mx, my))
@@ -543,11 +369,11 @@ def draw_menu():
 
 def draw_name_entry():
     screen.fill((25, 25, 25))
-    title = FONT_LG.render("Enter your details", True, WHITE)
+    title = text_cache.render(FONT_LG, "Enter your details", WHITE)
     screen.blit(title, (WIDTH // 2 - title.get_width() // 2, int(HEIGHT * 0.2)))
 
-    name_label  = FONT_MD.render("Name (required):", True, WHITE)
-    email_label = FONT_MD.render("Email (optional):", True, WHITE)
+    name_label  = text_cache.render(FONT_MD, "Name (required):", WHITE)
+    email_label = text_cache.render(FONT_MD, "Email (optional):", WHITE)
     screen.blit(name_label,  (int(WIDTH * 0.18), int(HEIGHT * 0.30)))
     screen.blit(email_label, (int(WIDTH * 0.18), int(HEIGHT * 0.45)))
 
@@ -556,20 +382,20 @@ def draw_name_entry():
     pygame.draw.rect(screen, WHITE, name_box,  2)
     pygame.draw.rect(screen, WHITE, email_box, 2)
 
-    ns = FONT_MD.render(name_text, True, WHITE)
-    es = FONT_MD.render(email_text, True, WHITE)
+    ns = text_cache.render(FONT_MD, name_text, WHITE)
+    es = text_cache.render(FONT_MD, email_text, WHITE)
     screen.blit(ns, (name_box.x + 10,  name_box.y + 8))
     screen.blit(es, (email_box.x + 10, email_box.y + 8))
 
-    indicator = FONT_SM.render("Typing: Name" if typing_name else "Typing: Email", True, WHITE)
+    indicator = text_cache.render(FONT_SM, "Typing: Name" if typing_name else "Typing: Email", WHITE)
     screen.blit(indicator, (int(WIDTH * 0.18), int(HEIGHT * 0.60)))
 
-    hint = FONT_SM.render("TAB = switch | ENTER = start | ESC = back", True, WHITE)
+    hint = text_cache.render(FONT_SM, "TAB = switch | ENTER = start | ESC = back", WHITE)
     screen.blit(hint, (WIDTH // 2 - hint.get_width() // 2, int(HEIGHT * 0.75)))
 
 def draw_question():
     screen.fill(GRAY)
-    words = q_text.split()
+    words = sim.q_text.split()
     lines = []
     cur = ""
     for w in words:
@@ -584,26 +410,26 @@ def draw_question():
 
     y = int(HEIGHT * 0.2)
     for line in lines:
-        txt = FONT_MD.render(line, True, WHITE)
+        txt = text_cache.render(FONT_MD, line, WHITE)
         screen.blit(txt, (WIDTH // 2 - txt.get_width() // 2, y))
         y += txt.get_height() + 5
 
     bw, bh = int(WIDTH * 0.4), int(HEIGHT * 0.08)
     start_y = int(HEIGHT * 0.45)
-    mx, my = pygame.mouse.get_pos()
+    mx, my = view.mouse_pos()
     for i, r in enumerate(q_buttons):
         r.width, r.height = bw, bh
         r.x = WIDTH // 2 - bw // 2
         r.y = start_y + i * (bh + int(HEIGHT * 0.02))
-        draw_button(r, q_answers[i], r.collidepoint(mx, my))
+        draw_button(r, sim.q_answers[i], r.collidepoint(mx, my))
 
 def draw_center_panel(title, buttons):
     screen.fill(GRAY)
-    t = FONT_LG.render(title, True, WHITE)
+    t = text_cache.render(FONT_LG, title, WHITE)
     screen.blit(t, (WIDTH // 2 - t.get_width() // 2, int(HEIGHT * 0.26)))
 
     bw, bh = int(WIDTH * 0.22), int(HEIGHT * 0.07)
-    mx, my = pygame.mouse.get_pos()
+    mx, my = view.mouse_pos()
     sy = int(HEIGHT * 0.45)
     for i, (label, r) in enumerate(buttons):
         r.width, r.height = bw, bh
@@ -611,119 +437,214 @@ def draw_center_panel(title, buttons):
         r.y = sy + i * (bh + int(HEIGHT * 0.02))
         draw_button(r, label, r.collidepoint(mx, my))
 
-def draw_gameplay():
-    # Background
-    if level_index == 1 and background2:
+def draw_level_static(surface, idx):
+    """Background, ground and platforms: everything that never moves"""
+    name = level_background(idx)
+    background = assets.get(name) if name else None
+    if background:
         # Level 2: show only the background, belts = platforms
-        screen.blit(background2, (0, 0))
+        surface.blit(background, (0, 0))
     else:
         # Other levels: simple background + visible platforms
-        screen.fill(BLACK)
-        pygame.draw.rect(screen, GREEN, (0, GROUND_Y, WIDTH, ss(GROUND_H)))
-        for p in platforms:
-            pygame.draw.rect(screen, BLUE, p)
+        surface.fill(BLACK)
+        pygame.draw.rect(surface, GREEN, (0, GROUND_Y, WIDTH, ss(GROUND_H)))
+        for p in levels[idx]["platforms"]:
+            pygame.draw.rect(surface, BLUE, p)
+
+# Pre-baked static layers, one display-format surface per (level, resolution)
+level_layers = {}
+
+def get_level_layer(idx):
+    """Static layer for level idx, baked the first time the level loads"""
+    key = (idx, WIDTH, HEIGHT, level_backgrounds)
+    layer = level_layers.get(key)
+    if layer is None:
+        layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+        draw_level_static(layer, idx)
+        level_layers[key] = layer
+    return layer
+
+def _no_mark(rect):
+    return rect
+
+def draw_gameplay(alpha=0.0):
+    """Draw the play field; alpha (0..1) is how far we are into the next tick"""
+    # Background
+    layer = get_level_layer(sim.level_index)
+    if DIRTY_RECT_RENDERING:
+        dirty.begin(layer, sim.level_index)
+        mark = dirty.mark
+    else:
+        screen.blit(layer, (0, 0))
+        mark = _no_mark
 
     # Hazards
-    for hz in hazards:
-        pygame.draw.rect(screen, HAZARD_COLOR, hz["rect"])
+    for r in sim.hazards.draw_rects():
+        mark(pygame.draw.rect(screen, HAZARD_COLOR, r))
 
     # Player
-    pygame.draw.rect(screen, BLUE, player)
+    mark(pygame.draw.rect(screen, BLUE, lerp_rect(sim.player, sim.prev_player_pos, alpha)))
 
-    # Enemies
-    for (er, _, _), alive in zip(enemies, enemy_alive):
-        if alive:
-            pygame.draw.rect(screen, RED, er)
+    # Enemies (one blits() call however many there are)
+    for r in solid_sprites.draw(screen, RED, sim.enemies.draw_rects(alpha)):
+        mark(r)
 
     # Collectibles
-    for c, got in zip(collectibles, collected):
+    for c, got in zip(sim.collectibles, sim.collected):
         if not got:
-            pygame.draw.rect(screen, YELLOW, c)
+            mark(pygame.draw.rect(screen, YELLOW, c))
 
     # Portal
-    if portal:
-        pygame.draw.rect(screen, PURPLE, portal)
+    if sim.portal:
+        mark(pygame.draw.rect(screen, PURPLE, sim.portal))
 
     # Bullets
-    for r, _, _ in projectiles:
-        pygame.draw.rect(screen, WHITE, r)
+    for r in solid_sprites.draw(screen, WHITE, sim.projectiles.draw_rects()):
+        mark(r)
 
     # Boss + HP bar
-    if boss:
-        pygame.draw.rect(screen, BOSS_COLOR, boss)
-        base_hp = LEVELS_BASE[2]["boss"]["hp"]
+    if sim.boss:
+        mark(pygame.draw.rect(screen, BOSS_COLOR, lerp_rect(sim.boss, sim.prev_boss_pos, alpha)))
+        base_hp = levels[sim.level_index]["boss_cfg"]["hp"]
         bw = int(min(500 * Sx, WIDTH * 0.4))
         x0 = WIDTH // 2 - bw // 2
-        pygame.draw.rect(screen, RED, (x0, 10, bw, ss(18)))
-        fill = max(0, int(bw * (boss_hp / base_hp)))
-        pygame.draw.rect(screen, (80, 220, 120), (x0, 10, fill, ss(18)))
-        screen.blit(FONT_SM.render("BOSS", True, WHITE), (x0 - ss(60), 10))
+        mark(pygame.draw.rect(screen, RED, (x0, 10, bw, ss(18))))
+        fill = max(0, int(bw * (sim.boss_hp / base_hp)))
+        mark(pygame.draw.rect(screen, (80, 220, 120), (x0, 10, fill, ss(18))))
+        mark(screen.blit(text_cache.render(FONT_SM, "BOSS", WHITE), (x0 - ss(60), 10)))
 
     # HUD – lives text (health bar removed)
-    screen.blit(FONT_SM.render(f"Lives: {lives}", True, WHITE), (ss(10), ss(10)))
+    mark(screen.blit(text_cache.render(FONT_SM, f"Lives: {sim.lives}", WHITE), (ss(10), ss(10))))
 
     # Timer
-    global final_time
-    if game_start_time is not None and not run_finished:
-        elapsed = time.time() - game_start_time
+    if sim.run_start_tick is not None and not sim.run_finished:
+        elapsed = sim.run_elapsed(alpha)
     else:
-        elapsed = final_time or 0.0
-    t_txt = FONT_SM.render(f"Time: {elapsed:.2f}s", True, WHITE)
-    screen.blit(t_txt, (ss(10), ss(50)))
+        elapsed = sim.final_time or 0.0
+    t_lbl = text_cache.render(FONT_SM, "Time: ", WHITE)
+    mark(screen.blit(t_lbl, (ss(10), ss(50))))
+    mark(timer_digits.blit(screen, f"{elapsed:.2f}s", (ss(10) + t_lbl.get_width(), ss(50))))
 
     # Attack cooldown
-    cd = max(0, next_shot_time - pygame.time.get_ticks())
+    cd = max(0, sim.next_shot_time - sim.sim_time_ms())
     if cd > 0:
         cd_s = int((cd + 999) / 1000)
         cd_txt = f"Attack CD: {cd_s}s"
     else:
         cd_txt = "Attack Ready"
-    screen.blit(FONT_SM.render(cd_txt, True, WHITE), (ss(10), ss(70)))
+    mark(screen.blit(text_cache.render(FONT_SM, cd_txt, WHITE), (ss(10), ss(70))))
+# ---------------------------------------------------------------------
+# ADAPTIVE QUALITY
+# ---------------------------------------------------------------------
+# On slow machines the governor trades looks for frame rate, one step at a
+# time, and gives it back when there is headroom (WASK_ADAPTIVE_QUALITY=0
+# turns it off; WASK_QUALITY_LOG=file also logs its decisions to a file).
+def set_level_backgrounds(on):
+    global level_backgrounds
+    level_backgrounds = on
+    dirty.invalidate()
+
+quality_steps = []
+if view.mode == "smooth":
+    quality_steps.append(("nearest-neighbour scaling",
+                          lambda: view.set_mode("scaled"), lambda: view.set_mode("smooth")))
+quality_steps.append(("no level backgrounds",
+                      lambda: set_level_backgrounds(False), lambda: set_level_backgrounds(True)))
+# No audio step: re-opening the mixer at a lower rate blocks the main thread
+# for longer than the frames it would save. No render scale step either: the
+# simulation works in render pixels and rounds speeds at that size, so a
+# smaller render would make runs slower on slow machines.
+
+ADAPTIVE_QUALITY = os.environ.get("WASK_ADAPTIVE_QUALITY", "1") != "0"
+governor = QualityGovernor(quality_steps, log_path=os.environ.get("WASK_QUALITY_LOG") or None)
+
+if memprof:
+    memprof.add_counter("runs", lambda: runs_started)
+    memprof.add_counter("text_surfaces", lambda: len(text_cache))
+    memprof.add_counter("level_layers", lambda: len(level_layers))
+    memprof.add_counter("image_surfaces", assets.surface_count)
+    memprof.add_counter("projectiles", lambda: sim.projectiles.n)
+    memprof.add_counter("hazards", lambda: sim.hazards.n)
+    memprof.add_counter("enemy_capacity", lambda: sim.enemies.capacity)
+    memprof.add_counter("sim_events", lambda: len(sim.events))
+    memprof.add_counter("question_buttons", lambda: len(q_buttons))
+    memprof.add_counter("replay_ops_bytes", lambda: len(recorder.ops) if recorder else 0)
+    memprof.add_counter("gc_objects", lambda: len(gc.get_objects()))
+
 # ---------------------------------------------------------------------
 # INITIALISE FIRST LEVEL
 # ---------------------------------------------------------------------
-reset_level(0)
+sim.reset_level(0)
+handle_sim_events()
+
+# Everything loaded so far lives for the whole session; move it out of the
+# collector's way so any collection that does happen has little to scan
+gc.collect()
+gc.freeze()
+if memprof:
+    memprof.snapshot("start")
+startup_times.append(("game setup", time.perf_counter()))
+
+def report_startup():
+    """Print where startup time went, up to the first presented frame"""
+    startup_times.append(("first frame", time.perf_counter()))
+    parts, prev = [], STARTUP_T0
+    for label, t in startup_times:
+        parts.append(f"{label} {(t - prev) * 1000:.0f}")
+        prev = t
+    print(f"Startup: first frame after {(prev - STARTUP_T0) * 1000:.0f} ms ({', '.join(parts)} ms)")
+
+def start_music_when_loaded():
+    """Start the soundtrack once the asset thread has opened the mixer"""
+    global music_playing
+    if not music_playing and assets.ready("music"):
+        music_playing = True
+        if assets.get("music"):
+            set_music_volume(game_state == "question")
+            pygame.mixer.music.play(-1)
 
 # ---------------------------------------------------------------------
 # MAIN LOOP
 # ---------------------------------------------------------------------
 running = True
+first_frame_shown = False
 while running:
     dt = clock.tick(60)
+    frame_start = time.perf_counter()
+    profiler.lap("wait")
+    gameplay_drawn = False
     clicked = False
     click_pos = None
     events = pygame.event.get()
 
     for ev in events:
+        input_buffer.handle(ev)
         if ev.type == pygame.QUIT:
             running = False
         elif ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
             clicked = True
-            click_pos = ev.pos
+            click_pos = view.to_render(ev.pos)
         elif ev.type == pygame.KEYDOWN and ev.key == pygame.K_m:
             muted = not muted
             set_music_volume(game_state == "question")
+        elif ev.type == pygame.KEYDOWN and ev.key == pygame.K_F3:
+            profiler.toggle()
+            dirty.invalidate()
         elif ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
             # ESC always exits (prevents getting trapped)
             running = False
+    profiler.lap("events")
 
-    keys = pygame.key.get_pressed()
-
-    # Controller button states (D-pad is buttons on this pad)
-    joy_left = joy_right = joy_up = joy_attack = joy_start = joy_select = False
-    if joy is not None and joy.get_init():
-        joy_left = bool(joy.get_button(DPAD_LEFT_BTN))
-        joy_right = bool(joy.get_button(DPAD_RIGHT_BTN))
-        joy_up = bool(joy.get_button(DPAD_UP_BTN))
-        joy_attack = bool(joy.get_button(BTN_A))
-        joy_start = bool(joy.get_button(BTN_START))
-        joy_select = bool(joy.get_button(BTN_SELECT))
+    # Controller START/SELECT (a fresh press) works the menus
+    start_pressed = input_buffer.take_press("start")
+    profiler.lap("input")
 
     # ========================= MENU =========================
     if game_state == "menu":
+        submitter.warm_up()
         play_r, board_r, quit_r = draw_menu()
         # Controller: START/SELECT acts like clicking Play
-        if joy_start or joy_select:
+        if start_pressed:
             game_state = "name_entry"
             name_text = ""
             email_text = ""
@@ -735,13 +656,16 @@ while running:
                 email_text = ""
                 typing_name = True
             elif board_r.collidepoint(click_pos):
-               # webbrowser.open("http://127.0.0.1:5000/")
-                webbrowser.open("https://krish-leaderboard.onrender.com/")
+                if LEADERBOARD_BOARD == "main":
+                    webbrowser.open(SERVER_URL + "/")
+                else:
+                    webbrowser.open(f"{SERVER_URL}/b/{LEADERBOARD_BOARD}/")
             elif quit_r.collidepoint(click_pos):
                 running = False
 
     # ====================== NAME ENTRY ======================
     elif game_state == "name_entry":
+        submitter.warm_up()
         for ev in events:
             if ev.type == pygame.KEYDOWN:
                 if ev.key == pygame.K_TAB:
@@ -751,7 +675,7 @@ while running:
                         player_name = name_text.strip()
                         player_email = email_text.strip()
                         start_run()
-                        game_state = "play"
+                        game_state = sim.mode
                 elif ev.key == pygame.K_BACKSPACE:
                     if typing_name:
                         name_text = name_text[:-1]
@@ -767,173 +691,47 @@ while running:
         draw_name_entry()
 
         # Controller: START/SELECT confirms name entry (same as Enter)
-        if joy_start or joy_select:
+        if start_pressed:
             if name_text.strip():
                 player_name = name_text.strip()
                 player_email = email_text.strip()
                 start_run()
-                game_state = "play"
+                game_state = sim.mode
 
     # ========================= PLAY =========================
     elif game_state == "play":
-        # Horizontal movement (keyboard + controller D-pad)
-        dx = 0
-        move_left = keys[pygame.K_LEFT] or joy_left
-        move_right = keys[pygame.K_RIGHT] or joy_right
-
-        if move_left:
-            dx = -MOVE_SPEED
-            facing = -1
-        elif move_right:
-            dx = MOVE_SPEED
-            facing = 1
-
-        player.x += int(dx)
-        if player.left < LEFT_WALL.right:
-            player.left = LEFT_WALL.right
-        if player.right > RIGHT_WALL.left:
-            player.right = RIGHT_WALL.left
-
-        # Jumping (single + double jump) (keyboard + controller)
-        jump_pressed = keys[pygame.K_UP] or joy_up
-        if jump_pressed:
-            if player_on_ground:
-                player_vel_y = JUMP_FORCE
-                player_on_ground = False
-                can_double_jump = True
-            elif can_double_jump:
-                player_vel_y = JUMP_FORCE
-                can_double_jump = False
-
-        # Shooting (Space / Controller A)
-        now = pygame.time.get_ticks()
-        attack_pressed = keys[pygame.K_SPACE] or joy_attack
-        if attack_pressed and now >= next_shot_time:
-            if len(projectiles) < 5:
-                b = pygame.Rect(player.centerx, player.centery, *BULLET_SIZE)
-                projectiles.append((b, facing, 0))
-                next_shot_time = now + ATTACK_COOLDOWN
-
-        # --- Vertical movement & platform collisions (ground + belts) ---
-        player_vel_y += GRAVITY
-        if player_vel_y > 14 * S:
-            player_vel_y = 14 * S
-
-        prev_bottom = player.bottom
-        prev_top = player.top
-
-        player.y += int(player_vel_y)
-        player_on_ground = False
-
-        # Ground collision
-        if player.bottom >= GROUND_Y:
-            player.bottom = GROUND_Y
-            player_vel_y = 0
-            player_on_ground = True
-
-        # Platforms (Level 2 belts are platforms; other levels may have none)
-        for p in platforms:
-            if player.colliderect(p):
-                # Landing on top
-                if player_vel_y >= 0 and prev_bottom <= p.top:
-                    player.bottom = p.top
-                    player_vel_y = 0
-                    player_on_ground = True
-                # Hitting underside
-                elif player_vel_y < 0 and prev_top >= p.bottom:
-                    player.top = p.bottom
-                    player_vel_y = 0
-
-        # Enemies
-        for i, (er, lo, hi) in enumerate(enemies):
-            if not enemy_alive[i]:
-                continue
-            er.x += int(enemy_dirs[i] * ss(2))
-            if er.left < lo or er.right > hi:
-                enemy_dirs[i] *= -1
-            if player.colliderect(er):
-                damage_player()
-
-        # Projectiles
-        new_proj = []
-        for r, d, dist in projectiles:
-            r.x += int(d * BULLET_SPEED)
-            dist += BULLET_SPEED
-            hit = False
-
-            # enemies
-            for j, (er, _, _) in enumerate(enemies):
-                if enemy_alive[j] and r.colliderect(er):
-                    enemy_alive[j] = False
-                    hit = True
-                    break
-
-            if r.left < 0 or r.right > WIDTH:
-                hit = True
-
-            if (not hit) and dist < ATTACK_RANGE:
-                new_proj.append((r, d, dist))
-
-        projectiles = new_proj
-
-        # Collectibles → T/F question
-        for i, c in enumerate(collectibles):
-            if (not collected[i]) and player.colliderect(c):
-                collected[i] = True
-                q, ans = random.choice(tf_questions)
-                answers = ["True", "False"]
-                correct_idx = 0 if ans else 1
-
-                def after_tf(correct):
-                    # If correct: gain a life (up to 5)
-                    global lives
-                    if correct:
-                        lives = min(5, lives + 1)
-
-                start_question(q, answers, correct_idx, after_tf)
+        tick_accumulator += dt
+        steps = 0
+        while tick_accumulator >= TICK_MS and sim.mode == "play":
+            if steps == MAX_TICKS_PER_FRAME:
+                tick_accumulator = 0.0
                 break
+            tick_accumulator -= TICK_MS
+            steps += 1
+            recorder.step(input_buffer.tick_inputs())
+        handle_sim_events()
+        game_state = sim.mode
+        profiler.lap("simulate")
 
-        # Portal logic (levels 1-2)
-        if level_index < 2:
-            if portal is None and all(collected) and not any(enemy_alive):
-                portal = pygame.Rect(WIDTH - ss(80), GROUND_Y - ss(80), ss(40), ss(80))
-
-            if portal and player.colliderect(portal):
-                q, opts, cidx = random.choice(mc_questions)
-
-                def after_portal(correct):
-                    global level_index, game_state
-                    if correct:
-                        if level_index + 1 < len(levels):
-                            level_index += 1
-                            reset_level(level_index)
-                        else:
-                            game_state = "win"
-
-                start_question(q, opts, cidx, after_portal)
-        else:
-            # Boss level
-            update_boss()
-            update_hazards()
-
-        # Lose condition
-        if lives <= 0:
-            game_state = "game_over"
-            if (not run_finished) and game_start_time is not None:
-                final_time = time.time() - game_start_time
-                run_finished = True
-                submit_result_to_server(player_name, player_email, final_time, "lose")
-
-        draw_gameplay()
+        draw_gameplay(min(1.0, tick_accumulator / TICK_MS))
+        gameplay_drawn = True
 
     # ====================== QUESTION SCREEN ======================
     elif game_state == "question":
+        # The run clock keeps ticking while the player reads the question
+        tick_accumulator += dt
+        while tick_accumulator >= TICK_MS:
+            tick_accumulator -= TICK_MS
+            recorder.step(NO_INPUT)
+        profiler.lap("simulate")
         draw_question()
         if clicked and click_pos:
             for i, r in enumerate(q_buttons):
                 if r.collidepoint(click_pos):
-                    handle_answer(i)
+                    recorder.answer(i)
                     break
+        handle_sim_events()
+        game_state = sim.mode
 
     # ====================== GAME OVER SCREEN =====================
     elif game_state == "game_over":
@@ -944,19 +742,18 @@ while running:
         ]
         draw_center_panel("YOU DIED", buttons)
 
-        if final_time is not None:
-            t = FONT_MD.render(f"Final Time: {final_time:.2f}s", True, WHITE)
+        if sim.final_time is not None:
+            t = text_cache.render(FONT_MD, f"Final Time: {sim.final_time:.2f}s", WHITE)
             screen.blit(t, (WIDTH // 2 - t.get_width() // 2, int(HEIGHT * 0.36)))
+        draw_submit_status()
 
         if clicked and click_pos:
             r0, r1, r2 = buttons[0][1], buttons[1][1], buttons[2][1]
             if r0.collidepoint(click_pos):
-                lives = 3
-                reset_level(level_index)
-                game_start_time = time.time()
-                run_finished = False
-                final_time = None
-                game_state = "play"
+                # Each attempt is its own replay, so long kiosk sessions stay
+                # under the server's replay length limit
+                start_run(sim.level_index)
+                game_state = sim.mode
             elif r1.collidepoint(click_pos):
                 game_state = "menu"
             elif r2.collidepoint(click_pos):
@@ -964,20 +761,16 @@ while running:
 
     # ========================== WIN SCREEN =======================
     elif game_state == "win":
-        if (not run_finished) and game_start_time is not None:
-            final_time = time.time() - game_start_time
-            run_finished = True
-            submit_result_to_server(player_name, player_email, final_time, "win")
-
         buttons = [
             ("Restart", pygame.Rect(0, 0, 0, 0)),
             ("Quit", pygame.Rect(0, 0, 0, 0)),
         ]
         draw_center_panel("YOU WIN", buttons)
 
-        if final_time is not None:
-            t = FONT_MD.render(f"Final Time: {final_time:.2f}s", True, WHITE)
+        if sim.final_time is not None:
+            t = text_cache.render(FONT_MD, f"Final Time: {sim.final_time:.2f}s", WHITE)
             screen.blit(t, (WIDTH // 2 - t.get_width() // 2, int(HEIGHT * 0.36)))
+        draw_submit_status()
 
         if clicked and click_pos:
             r0, r1 = buttons[0][1], buttons[1][1]
@@ -989,8 +782,39 @@ while running:
             elif r1.collidepoint(click_pos):
                 running = False
 
-    pygame.display.flip()
+    if game_state != "play":
+        input_buffer.discard()
+    profiler.lap("draw")
 
+    overlay = profiler.draw(screen, FONT_SM, (ss(10), ss(100)), extra=input_buffer.latency_lines)
+    if gameplay_drawn and DIRTY_RECT_RENDERING:
+        dirty.mark(overlay)
+    profiler.lap("overlay")
+
+    if gameplay_drawn and DIRTY_RECT_RENDERING:
+        dirty.present()
+    else:
+        view.present()
+        # Menus and panels paint over everything; gameplay must start clean
+        dirty.invalidate()
+    input_buffer.presented()
+    if not first_frame_shown:
+        first_frame_shown = True
+        report_startup()
+        assets.request("music")
+    start_music_when_loaded()
+    profiler.lap("present")
+    profiler.end_frame(state=game_state)
+    if memprof:
+        memprof.maybe_snapshot()
+    if ADAPTIVE_QUALITY and gameplay_drawn:
+        governor.frame((time.perf_counter() - frame_start) * 1000)
+
+profiler.close()
+if memprof:
+    memprof.close()
+for source, stats in input_buffer.latency_summary().items():
+    print(f"{source} input-to-present latency: {stats}")
 pygame.quit()
 sys.exit()
 
@@ -0,0 +1,186 @@
+"""Local event aggregator for many game stations.
+
+At events 10-30 kiosks would otherwise each post to the remote server. Run
+this on one laptop on the LAN instead and point every kiosk's SERVER_URL at
+it. It is server.py (same routes, same pages) on its own database, so
+kiosks submit to it unchanged and the live board is served locally. Every
+game result it stores is also queued for the upstream server, and sent
+there in batches, one ScoreSubmitter per board: spooled to disk first,
+retried with backoff while the internet is down, and keeping the kiosk's
+submission_id so retries never double-post.
+
+    python aggregator.py serve --upstream https://krish-leaderboard.onrender.com
+
+Stand-ins for both ends make it testable with no internet at all:
+
+    python aggregator.py upstream --port 5060 --fail-rate 0.3   # fake remote server
+    python aggregator.py serve --port 5050 --upstream http://127.0.0.1:5060
+    python aggregator.py kiosks --target http://127.0.0.1:5050 --kiosks 20 --results 5
+"""
+import argparse
+import base64
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from score_client import STATUS_REJECTED, STATUS_SAVED, ScoreSubmitter
+
+DEFAULT_UPSTREAM = "https://krish-leaderboard.onrender.com"
+DEFAULT_SPOOL_DIR = Path(__file__).parent / "aggregator_spool"
+
+
+class UpstreamForwarder:
+    """server.score_listeners hook: queues stored game results for upstream"""
+
+    def __init__(self, upstream_url, spool_dir=DEFAULT_SPOOL_DIR, batch_delay=5.0):
+        self.upstream_url = upstream_url
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_delay = batch_delay
+        self.forwarded = 0
+        self._submitters = {}
+        self._lock = threading.Lock()
+        # Results spooled by an earlier session start draining right away
+        for path in self.spool_dir.glob("*.jsonl"):
+            self._submitter(path.stem)
+
+    def _submitter(self, board):
+        with self._lock:
+            sub = self._submitters.get(board)
+            if sub is None:
+                sub = ScoreSubmitter(self.upstream_url, board, spool_path=self.spool_dir / f"{board}.jsonl",
+                                     batch_delay=self.batch_delay)
+                self._submitters[board] = sub
+            return sub
+
+    def __call__(self, board, entries):
+        sub = None
+        for entry in entries:
+            if entry["score_type"] != "game":
+                continue
+            payload = {
+                "submission_id": entry.get("submission_id") or uuid.uuid4().hex,
+                "name": entry["name"],
+                "email": entry["email"],
+                "time_s": float(entry["time_s"]),
+                "outcome": entry["outcome"],
+            }
+            if entry.get("replay"):
+                payload["replay"] = base64.b64encode(entry["replay"]).decode("ascii")
+            sub = sub or self._submitter(board)
+            sub.forward(payload)
+            self.forwarded += 1
+
+    def status(self):
+        with self._lock:
+            submitters = dict(self._submitters)
+        return {
+            "upstream": self.upstream_url,
+            "queued_total": self.forwarded,
+            "boards": {board: {"pending": sub.pending(), "status": sub.status}
+                       for board, sub in submitters.items()},
+        }
+
+
+def _load_server(db_path):
+    # server.py picks its database at import time
+    os.environ["LEADERBOARD_DB"] = str(db_path)
+    import server
+    return server
+
+
+def serve(args):
+    server = _load_server(args.db)
+    forwarder = UpstreamForwarder(args.upstream, args.spool_dir, args.batch_delay)
+    server.score_listeners.append(forwarder)
+
+    @server.app.route("/aggregator")
+    def aggregator_status():
+        return server.jsonify(forwarder.status())
+
+    print(f"📡 Aggregating on port {args.port}, forwarding to {args.upstream} every ~{args.batch_delay:g}s")
+    server.app.run(host=args.host, port=args.port, debug=False, threaded=True)
+
+
+def upstream(args):
+    """Stand-in for the remote server: plain server.py, optionally flaky"""
+    server = _load_server(args.db)
+    rng = random.Random()
+
+    @server.app.before_request
+    def maybe_fail():
+        if server.request.method == "POST" and rng.random() < args.fail_rate:
+            return server.jsonify({"error": "stand-in upstream failure"}), 503
+        return None
+
+    print(f"🧪 Stand-in upstream on port {args.port} (failing {args.fail_rate:.0%} of posts)")
+    server.app.run(host=args.host, port=args.port, debug=False, threaded=True)
+
+
+def kiosks(args):
+    """Stand-in game stations: each posts results through its own ScoreSubmitter"""
+    spool_dir = Path(args.spool_dir)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(args.seed)
+    stations = [ScoreSubmitter(args.target, args.board, spool_path=spool_dir / f"kiosk_{i:02d}.jsonl")
+                for i in range(args.kiosks)]
+    for round_ in range(args.results):
+        for i, station in enumerate(stations):
+            outcome = "win" if rng.random() < 0.4 else "lose"
+            station.submit(f"Kiosk{i:02d}-{round_}", "", round(rng.uniform(20, 240), 2), outcome)
+        time.sleep(args.interval)
+
+    deadline = time.monotonic() + args.timeout
+    while time.monotonic() < deadline:
+        if all(station.status in (STATUS_SAVED, STATUS_REJECTED) for station in stations):
+            break
+        time.sleep(0.5)
+    left = sum(station.pending() for station in stations)
+    print(f"Posted {args.kiosks * args.results} results from {args.kiosks} kiosks; {left} still spooled")
+    return left
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WASK leaderboard event aggregator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="run the aggregator")
+    p.add_argument("--upstream", default=os.environ.get("UPSTREAM_URL", DEFAULT_UPSTREAM))
+    p.add_argument("--db", default="aggregator.db")
+    p.add_argument("--spool-dir", default=DEFAULT_SPOOL_DIR)
+    p.add_argument("--batch-delay", type=float, default=5.0,
+                   help="seconds a result waits for others to join its upstream batch")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=5050)
+    p.set_defaults(func=serve)
+
+    p = sub.add_parser("upstream", help="stand-in for the remote server")
+    p.add_argument("--db", default="upstream_standin.db")
+    p.add_argument("--fail-rate", type=float, default=0.0, help="share of POSTs answered with 503")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=5060)
+    p.set_defaults(func=upstream)
+
+    p = sub.add_parser("kiosks", help="stand-in game stations posting results")
+    p.add_argument("--target", default="http://127.0.0.1:5050")
+    p.add_argument("--board", default="main")
+    p.add_argument("--kiosks", type=int, default=20)
+    p.add_argument("--results", type=int, default=5, help="results per kiosk")
+    p.add_argument("--interval", type=float, default=0.2, help="seconds between rounds")
+    p.add_argument("--spool-dir", default="kiosk_spool")
+    p.add_argument("--timeout", type=float, default=60.0)
+    p.add_argument("--seed", type=int, default=None)
+    p.set_defaults(func=kiosks)
+
+    args = parser.parse_args()
+    result = args.func(args)
+    if args.command == "kiosks" and result:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
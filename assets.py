@@ -0,0 +1,196 @@
+"""Background asset loading for Cyber_game.py.
+
+Images are decoded and scaled on a worker thread while the main thread shows
+a loading screen. Scaled images are cached on disk per resolution, so the
+next start skips both the JPEG decode and the scale. Assets registered as
+lazy are only loaded when first requested (e.g. a level's background).
+
+Only the final convert() to display format happens on the main thread, the
+first time an image is fetched with get().
+
+System fonts are looked up by name once and the resolved file path is kept
+in the cache directory (see resolve_font()).
+"""
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+
+import pygame
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".asset_cache"
+
+_PENDING = object()
+
+
+class AssetManager:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self._loaders = {}
+        self._results = {}
+        self._converted = {}
+        self._eager = []
+        self._ready = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._fonts = {}
+
+    # -----------------------------------------------------------------
+    # Registration
+    # -----------------------------------------------------------------
+    def add(self, name, loader, lazy=False):
+        """Register a loader callable; its return value becomes the asset"""
+        self._loaders[name] = loader
+        self._ready[name] = threading.Event()
+        if not lazy:
+            self._eager.append(name)
+
+    def __contains__(self, name):
+        return name in self._loaders
+
+    def add_image(self, name, filename, size=None, lazy=False):
+        """Register an image, optionally scaled to size=(w, h)"""
+        self.add(name, lambda: self._load_image(filename, size), lazy)
+
+    # -----------------------------------------------------------------
+    # Loading
+    # -----------------------------------------------------------------
+    def start(self):
+        """Begin loading every eager asset in the background"""
+        for name in self._eager:
+            self.request(name)
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="asset-loader", daemon=True)
+            self._worker.start()
+
+    def request(self, name):
+        """Queue a (lazy) asset for background loading; no-op if already queued"""
+        with self._lock:
+            if name in self._results:
+                return
+            self._results[name] = _PENDING
+        self._queue.put(name)
+
+    def progress(self):
+        """(loaded, total) for the eager assets"""
+        loaded = sum(1 for name in self._eager if self._ready[name].is_set())
+        return loaded, len(self._eager)
+
+    def wait(self, timeout):
+        """Block until the eager assets are in or `timeout` seconds pass; -> done()"""
+        deadline = time.monotonic() + timeout
+        for name in self._eager:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._ready[name].wait(remaining):
+                break
+        return self.done()
+
+    def ready(self, name):
+        """True once a requested asset has finished loading (never blocks)"""
+        return name in self._ready and self._ready[name].is_set()
+
+    def done(self):
+        loaded, total = self.progress()
+        return loaded == total
+
+    def get(self, name):
+        """Return an asset, loading it now if nobody has asked for it yet.
+
+        Images come back converted to the display format. A failed load
+        returns None.
+        """
+        if name in self._converted:
+            return self._converted[name]
+        self.request(name)
+        self._ready[name].wait()
+        value = self._results[name]
+        if isinstance(value, pygame.Surface) and pygame.display.get_surface() is not None:
+            value = value.convert_alpha() if value.get_alpha() else value.convert()
+        self._converted[name] = value
+        return value
+
+    # -----------------------------------------------------------------
+    # Fonts
+    # -----------------------------------------------------------------
+    def resolve_font(self, name):
+        """File path of system font `name`, or None for pygame's default font.
+
+        pygame.font.SysFont() scans every installed font (fc-list on Linux,
+        the registry on Windows) the first time it is used. The path it
+        finds is cached on disk so later starts open the file directly. A
+        font that isn't installed is remembered too; delete fonts.json in
+        the cache directory to search again.
+        """
+        with self._lock:
+            if name in self._fonts:
+                return self._fonts[name]
+        cache = self.cache_dir / "fonts.json"
+        try:
+            cached = json.loads(cache.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cached = {}
+
+        path = cached.get(name)
+        if name not in cached or (path is not None and not Path(path).exists()):
+            path = pygame.font.match_font(name)
+            cached[name] = path
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                cache.write_text(json.dumps(cached, indent=2), encoding="utf-8")
+            except OSError as e:
+                print("Could not write font cache:", e)
+        with self._lock:
+            self._fonts[name] = path
+        return path
+
+    def surface_count(self):
+        """Image surfaces held, loaded copies and display-format copies alike"""
+        values = list(self._results.values()) + list(self._converted.values())
+        return len({id(v) for v in values if isinstance(v, pygame.Surface)})
+
+    def _run(self):
+        while True:
+            name = self._queue.get()
+            try:
+                value = self._loaders[name]()
+            except Exception as e:
+                print(f"Could not load asset {name}:", e)
+                value = None
+            self._results[name] = value
+            self._ready[name].set()
+
+    # -----------------------------------------------------------------
+    # Images
+    # -----------------------------------------------------------------
+    def _find(self, filename):
+        for p in [Path.cwd() / filename, Path(__file__).parent / filename]:
+            if p.exists():
+                return p
+        raise FileNotFoundError(filename)
+
+    def _load_image(self, filename, size):
+        path = self._find(filename)
+        if size is None:
+            return pygame.image.load(str(path))
+
+        # Cached copies are named after the source's mtime so edits invalidate them
+        w, h = size
+        cached = self.cache_dir / f"{path.stem}_{w}x{h}_{int(path.stat().st_mtime)}.bmp"
+        if cached.exists():
+            try:
+                return pygame.image.load(str(cached))
+            except Exception as e:
+                print(f"Ignoring bad asset cache {cached.name}:", e)
+
+        img = pygame.transform.scale(pygame.image.load(str(path)), size)
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+            tmp = cached.with_suffix(".tmp.bmp")
+            pygame.image.save(img, str(tmp))
+            tmp.replace(cached)
+        except Exception as e:
+            print("Could not write asset cache:", e)
+        print(f"Loaded {filename}")
+        return img
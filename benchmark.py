@@ -0,0 +1,244 @@
+"""Stress scenes and a frame-time benchmark for the game loop.
+
+Each scene loads a level into a GameState, piles synthetic entities on top
+(hundreds of enemies, a full pool of boss shockwaves, a field of platforms)
+and runs a fixed number of frames with scripted input: one simulation tick,
+a draw of the play field the way Cyber_game.py draws it, and a present. The
+player can't die and questions never open, so the scene stays as built.
+
+Phases are timed with FrameProfiler. The mean and p99 of each phase per
+scene go to a JSON file, and --baseline compares against an earlier file
+and exits non-zero if any scene's p99 frame time got worse than allowed.
+
+    python benchmark.py --out bench.json
+    python benchmark.py --scenes enemies_1000 shockwaves --windowed --render scaled
+    python benchmark.py --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy
+import pygame
+
+from entity_store import EntityPool
+from frame_profiler import FrameProfiler
+from scaled_display import MODES, ScaledDisplay
+from simulation import BASE_H, BASE_W, GameState
+from solid_sprites import SolidSprites
+
+SCENES = {}
+
+
+def scene(name):
+    def register(fn):
+        SCENES[name] = fn
+        return fn
+    return register
+
+
+def _spread_enemies(sim, count, seed):
+    rng = random.Random(seed)
+    size = sim.ss(40)
+    left, right = sim.left_wall.right, sim.right_wall.left
+    sim.enemies.clear()
+    for _ in range(count):
+        x = rng.randrange(left, right - size)
+        y = sim.ground_y - size - rng.randrange(0, sim.ss(300))
+        lo = max(left, x - sim.ss(150))
+        hi = min(right, x + size + sim.ss(150))
+        vx = sim.enemy_speed if rng.random() < 0.5 else -sim.enemy_speed
+        sim.enemies.add(x, y, size, size, vx=vx, lo=lo, hi=hi)
+
+
+def _enemies_scene(count):
+    def build(sim):
+        sim.reset_level(0)
+        _spread_enemies(sim, count, count)
+        return None
+    return build
+
+
+for _count in (10, 100, 1000):
+    SCENES[f"enemies_{_count}"] = _enemies_scene(_count)
+
+
+@scene("shockwaves")
+def build_shockwaves(sim, capacity=256):
+    """Boss level with a shockwave pool many times the usual size, kept full"""
+    boss_level = next(i for i in range(len(sim.levels)) if sim.levels[i]["boss_cfg"])
+    sim.reset_level(boss_level)
+    sim.boss_hp = 10 ** 9
+    sim.hazards = EntityPool(capacity=capacity, extra=("speed", "shift", "life"))
+    rng = random.Random(capacity)
+
+    def refill(sim):
+        while sim.hazards.n <= sim.hazards.capacity - 2:
+            sim.spawn_shockwaves(rng.randrange(sim.width), sim.ground_y - rng.randrange(sim.ss(300)))
+    return refill
+
+
+@scene("platforms")
+def build_platforms(sim, count=400):
+    """A dense field of platforms, plus some enemies, for the collision grid"""
+    sim.reset_level(0)
+    rng = random.Random(count)
+    w, h = sim.ss(60), sim.ss(10)
+    sim.platforms = [pygame.Rect(rng.randrange(sim.width - w), rng.randrange(sim.ss(60), sim.ground_y - h), w, h)
+                     for _ in range(count)]
+    sim.platform_grid.build(sim.platforms)
+    _spread_enemies(sim, 50, count)
+    return None
+
+
+def scripted_input(frame):
+    """Sweep left and right, jumping and firing (same every run)"""
+    right = (frame // 150) % 2 == 0
+    return {"left": not right, "right": right, "jump": frame % 40 == 0, "attack": True}
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def run_scene(name, frames, view):
+    screen = view.surface
+    sim = GameState(screen.get_size(), seed=1)
+    sim.start_run()
+    per_tick = SCENES[name](sim)
+    # Keep the scene as built: no deaths, no question screens
+    sim.damage_player = lambda: None
+    sim.start_question = lambda *args: None
+    sim.events.clear()
+
+    # Static layer, as Cyber_game.py bakes it (plain background, no art)
+    layer = pygame.Surface(screen.get_size()).convert()
+    layer.fill((0, 0, 0))
+    pygame.draw.rect(layer, (60, 255, 60), (0, sim.ground_y, sim.width, sim.height - sim.ground_y))
+    for p in sim.platforms:
+        pygame.draw.rect(layer, (80, 200, 255), p)
+    font = pygame.font.Font(None, max(12, int(sim.height * 0.035)))
+    sprites = SolidSprites()
+
+    entities = {"enemies": sim.enemies.count_alive(), "platforms": len(sim.platforms), "hazards_peak": 0}
+    profiler = FrameProfiler(enabled=True, history=frames, phases=("events", "simulate", "draw", "present"))
+    for frame in range(frames):
+        pygame.event.pump()
+        profiler.lap("events")
+
+        if per_tick:
+            per_tick(sim)
+        sim.step(scripted_input(frame))
+        sim.events.clear()
+        entities["hazards_peak"] = max(entities["hazards_peak"], sim.hazards.n)
+        profiler.lap("simulate")
+
+        screen.blit(layer, (0, 0))
+        for r in sim.hazards.draw_rects():
+            pygame.draw.rect(screen, (255, 120, 120), r)
+        pygame.draw.rect(screen, (80, 200, 255), sim.player)
+        sprites.draw(screen, (220, 60, 60), sim.enemies.draw_rects())
+        sprites.draw(screen, (255, 255, 255), sim.projectiles.draw_rects())
+        if sim.boss:
+            pygame.draw.rect(screen, (120, 150, 255), sim.boss)
+        screen.blit(font.render(f"{name} frame {frame}", True, (255, 255, 255)), (10, 10))
+        profiler.lap("draw")
+
+        view.present()
+        profiler.lap("present")
+        profiler.end_frame()
+
+    entities["enemies_left"] = sim.enemies.count_alive()
+    totals = [t for t, _ in profiler.history]
+    result = {
+        "frames": frames,
+        "entities": entities,
+        "frame_ms": {"mean": round(sum(totals) / len(totals), 4), "p99": round(percentile(totals, 0.99), 4)},
+        "phases": {},
+    }
+    for phase in profiler.phases:
+        values = [ph[phase] for _, ph in profiler.history]
+        result["phases"][phase] = {"mean": round(sum(values) / len(values), 4),
+                                   "p99": round(percentile(values, 0.99), 4)}
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Scenes whose p99 frame time grew by more than tolerance; -> [message]"""
+    regressions = []
+    for name, res in results["scenes"].items():
+        old = baseline.get("scenes", {}).get(name)
+        if not old:
+            continue
+        before, after = old["frame_ms"]["p99"], res["frame_ms"]["p99"]
+        if before > 0 and after > before * (1 + tolerance):
+            regressions.append(f"{name}: p99 {before:.2f} -> {after:.2f} ms (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game loop on synthetic stress scenes")
+    parser.add_argument("--scenes", nargs="+", choices=sorted(SCENES), default=list(SCENES))
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--size", default="800x500", help="window / display size, WxH")
+    parser.add_argument("--render", choices=MODES, default="native",
+                        help="as WASK_RENDER in Cyber_game.py")
+    parser.add_argument("--windowed", action="store_true", help="open a real window (default: SDL's dummy driver)")
+    parser.add_argument("--out", default="benchmark.json")
+    parser.add_argument("--baseline", help="earlier --out file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="allowed p99 frame time growth over the baseline (0.20 = 20%%)")
+    args = parser.parse_args()
+
+    if not args.windowed:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.display.init()
+    pygame.font.init()
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    display = pygame.display.set_mode((w, h))
+    pygame.display.set_caption("WASK benchmark")
+    view = ScaledDisplay(display, (BASE_W, BASE_H), args.render)
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "size": [w, h], "render": args.render, "render_size": list(view.surface.get_size()),
+            "windowed": args.windowed, "frames": args.frames,
+            "python": platform.python_version(), "pygame": pygame.version.ver,
+            "numpy": numpy.__version__, "machine": platform.machine(),
+        },
+        "scenes": {},
+    }
+    for name in args.scenes:
+        res = run_scene(name, args.frames, view)
+        results["scenes"][name] = res
+        phases = "  ".join(f"{p} {v['mean']:.2f}/{v['p99']:.2f}" for p, v in res["phases"].items())
+        print(f"{name:14} frame {res['frame_ms']['mean']:6.2f} mean / {res['frame_ms']['p99']:6.2f} p99 ms   {phases}")
+    pygame.quit()
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for msg in regressions:
+            print("REGRESSION", msg)
+        if regressions:
+            sys.exit(1)
+        print(f"No scene slower than the baseline by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
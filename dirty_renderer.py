@@ -0,0 +1,53 @@
+"""Dirty-rectangle renderer for the gameplay screen.
+
+Instead of refilling the whole screen every frame, only the areas that were
+drawn last frame are restored from a cached background, and only those plus
+this frame's areas are pushed to the display with pygame.display.update().
+Any background change (new level, coming back from a menu) falls back to one
+full redraw.
+"""
+import pygame
+
+
+class DirtyRectRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+        self.background = None
+        self.background_key = None
+        self.full_redraw = True
+        self.prev_rects = []
+        self.rects = []
+
+    def invalidate(self):
+        """Force the next frame to be a full redraw"""
+        self.full_redraw = True
+
+    def begin(self, background, key):
+        """Start a frame over `background`; key identifies it (e.g. level)"""
+        if key != self.background_key or background is not self.background:
+            self.background = background
+            self.background_key = key
+            self.full_redraw = True
+
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for r in self.prev_rects:
+                self.screen.blit(self.background, r, r)
+        self.rects = []
+
+    def mark(self, rect):
+        """Record an area drawn this frame; returns rect for chaining"""
+        if rect:
+            self.rects.append(pygame.Rect(rect))
+        return rect
+
+    def present(self):
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            # Old areas must be pushed too, or erased sprites stay on screen
+            pygame.display.update(self.prev_rects + self.rects)
+        self.prev_rects = self.rects
+        self.rects = []
@@ -0,0 +1,198 @@
+"""Struct-of-arrays entity storage for Cyber_game.py.
+
+Enemies, projectiles and shockwave hazards keep their position, velocity,
+size and alive flag in contiguous NumPy arrays, so movement, bounds checks,
+lifetime decay and AABB overlap tests run as batch array operations rather
+than per-entity Python loops.
+
+Batch operations write into scratch arrays owned by the store and dead
+entities are compacted in place, so a frame's update creates no new arrays.
+EntityPool is the fixed-capacity variant for short-lived entities: it never
+reallocates at all, and a full pool simply refuses new entities.
+
+Coordinates are screen pixels. Everything the game adds is a whole number,
+so int() on the float columns gives the same rects as before.
+"""
+import numpy as np
+import pygame
+
+BASE_COLUMNS = ("x", "y", "w", "h", "vx", "vy", "prev_x", "prev_y")
+
+
+class EntityStore:
+    def __init__(self, capacity=16, extra=()):
+        self.n = 0
+        self.capacity = capacity
+        self.columns = BASE_COLUMNS + tuple(extra)
+        for name in self.columns:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+        self.alive = np.zeros(capacity, dtype=bool)
+        self._allocate_scratch()
+
+    def _allocate_scratch(self):
+        self._cols = [getattr(self, name) for name in self.columns]
+        self._hit = np.zeros(self.capacity, dtype=bool)
+        self._cond = np.zeros(self.capacity, dtype=bool)
+        self._mask = np.zeros(self.capacity, dtype=bool)
+        self._f = np.zeros(self.capacity, dtype=np.float64)
+
+    # -----------------------------------------------------------------
+    # Population
+    # -----------------------------------------------------------------
+    def _grow(self):
+        self.capacity *= 2
+        for name in self.columns:
+            col = np.zeros(self.capacity, dtype=np.float64)
+            col[:self.n] = getattr(self, name)[:self.n]
+            setattr(self, name, col)
+        alive = np.zeros(self.capacity, dtype=bool)
+        alive[:self.n] = self.alive[:self.n]
+        self.alive = alive
+        self._allocate_scratch()
+
+    def add(self, x, y, w, h, vx=0.0, vy=0.0, **extra):
+        """Append one entity; returns its index"""
+        if self.n == self.capacity:
+            self._grow()
+        i = self.n
+        self.x[i], self.y[i], self.w[i], self.h[i] = x, y, w, h
+        self.vx[i], self.vy[i] = vx, vy
+        self.prev_x[i], self.prev_y[i] = x, y
+        for name, value in extra.items():
+            getattr(self, name)[i] = value
+        self.alive[i] = True
+        self.n += 1
+        return i
+
+    def clear(self):
+        self.n = 0
+
+    def compact(self):
+        """Drop dead entities, sliding the live ones down in order"""
+        alive = self.alive
+        k = 0
+        for i in range(self.n):
+            if alive[i]:
+                if k != i:
+                    for col in self._cols:
+                        col[k] = col[i]
+                    alive[k] = True
+                k += 1
+        self.n = k
+
+    def __len__(self):
+        return self.n
+
+    def any_alive(self):
+        return bool(self.alive[:self.n].any())
+
+    def count_alive(self):
+        return int(self.alive[:self.n].sum())
+
+    # -----------------------------------------------------------------
+    # Batch updates
+    # -----------------------------------------------------------------
+    def snapshot(self):
+        """Remember current positions for render interpolation"""
+        n = self.n
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    def integrate(self):
+        """x += vx, y += vy for every live entity"""
+        n = self.n
+        step, live = self._f[:n], self.alive[:n]
+        np.multiply(self.vx[:n], live, out=step)
+        self.x[:n] += step
+        np.multiply(self.vy[:n], live, out=step)
+        self.y[:n] += step
+
+    def reverse_outside(self, lo, hi):
+        """vx = -vx for live entities that left their [lo, hi] x range.
+
+        lo and hi are per-entity columns (e.g. patrol bounds).
+        """
+        n = self.n
+        out, cond, f = self._hit[:n], self._cond[:n], self._f[:n]
+        np.less(self.x[:n], lo[:n], out=out)
+        np.add(self.x[:n], self.w[:n], out=f)
+        np.greater(f, hi[:n], out=cond)
+        out |= cond
+        out &= self.alive[:n]
+        np.negative(self.vx[:n], where=out, out=self.vx[:n])
+
+    def mask(self):
+        """Scratch bool array of length n for callers' own conditions"""
+        return self._mask[:self.n]
+
+    def keep(self, mask):
+        """alive &= mask"""
+        self.alive[:self.n] &= mask
+
+    def drop(self, mask):
+        """alive &= ~mask; mask is overwritten"""
+        np.logical_not(mask, out=mask)
+        self.keep(mask)
+
+    def overlaps(self, rect):
+        """Mask of live entities whose AABB intersects rect (pygame semantics)"""
+        return self.overlaps_box(rect.x, rect.y, rect.width, rect.height)
+
+    def overlaps_box(self, x, y, w, h):
+        """overlaps() for a box given as numbers.
+
+        The result is a scratch array, overwritten by the next call.
+        """
+        n = self.n
+        hit, cond, f = self._hit[:n], self._cond[:n], self._f[:n]
+        if w <= 0 or h <= 0:
+            hit[:] = False
+            return hit
+        hit[:] = self.alive[:n]
+        np.less(self.x[:n], x + w, out=cond)
+        hit &= cond
+        np.less(self.y[:n], y + h, out=cond)
+        hit &= cond
+        np.add(self.x[:n], self.w[:n], out=f)
+        np.greater(f, x, out=cond)
+        hit &= cond
+        np.add(self.y[:n], self.h[:n], out=f)
+        np.greater(f, y, out=cond)
+        hit &= cond
+        np.greater(self.w[:n], 0, out=cond)
+        hit &= cond
+        np.greater(self.h[:n], 0, out=cond)
+        hit &= cond
+        return hit
+
+    # -----------------------------------------------------------------
+    # Drawing / interop
+    # -----------------------------------------------------------------
+    def rect(self, i):
+        return pygame.Rect(int(self.x[i]), int(self.y[i]), int(self.w[i]), int(self.h[i]))
+
+    def draw_rects(self, alpha=None):
+        """(x, y, w, h) tuples for live entities, interpolated if alpha given"""
+        n = self.n
+        if alpha is None:
+            xs, ys = self.x[:n], self.y[:n]
+        else:
+            xs = self.prev_x[:n] + (self.x[:n] - self.prev_x[:n]) * alpha
+            ys = self.prev_y[:n] + (self.y[:n] - self.prev_y[:n]) * alpha
+        live = np.flatnonzero(self.alive[:n])
+        # One vectorised round/convert instead of four numpy scalars per entity
+        return list(zip(np.rint(xs[live]).astype(int).tolist(), np.rint(ys[live]).astype(int).tolist(),
+                        self.w[live].astype(int).tolist(), self.h[live].astype(int).tolist()))
+
+
+class EntityPool(EntityStore):
+    """Fixed-capacity store for short-lived entities (bullets, shockwaves).
+
+    The arrays are allocated once. add() returns None when the pool is full
+    instead of growing, so the capacity doubles as the gameplay limit.
+    """
+
+    def add(self, x, y, w, h, vx=0.0, vy=0.0, **extra):
+        if self.n == self.capacity:
+            return None
+        return super().add(x, y, w, h, vx, vy, **extra)
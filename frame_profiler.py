@@ -0,0 +1,159 @@
+"""Per-phase frame timing for Cyber_game.py.
+
+The main loop calls lap(phase) at the end of each phase (waiting for the
+frame clock, event polling, input, simulation, drawing, present) and
+end_frame() once per frame. Each phase is timed with perf_counter_ns.
+
+F3 toggles an overlay with a rolling frame-time graph against the 60 FPS
+budget and the average of each phase. Setting a trace path writes one row
+per frame for offline analysis: CSV is written as it goes, JSON once on
+close().
+"""
+import csv
+import json
+import time
+from collections import deque
+from pathlib import Path
+
+import pygame
+
+BUDGET_MS = 1000.0 / 60
+
+# Phases of Cyber_game.py's main loop, in order; lap() accepts others too
+PHASES = ("wait", "events", "input", "simulate", "draw", "overlay", "present")
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, trace_path=None, history=240, phases=PHASES):
+        self.enabled = enabled
+        self.history = deque(maxlen=history)   # (total_ms, {phase: ms})
+        self.frame = 0
+        self.phases = list(phases)
+        self._times = {}
+        self._frame_start = time.perf_counter_ns()
+        self._last = self._frame_start
+
+        self.trace_path = Path(trace_path) if trace_path else None
+        self._trace_rows = []
+        self._csv_file = None
+        self._csv = None
+
+        # Overlay text is re-rendered a few times a second, not every frame
+        self._labels = []
+        self._labels_frame = None
+
+    @property
+    def active(self):
+        return self.enabled or self.trace_path is not None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    # -----------------------------------------------------------------
+    # Timing
+    # -----------------------------------------------------------------
+    def lap(self, phase):
+        """End `phase`: time since the previous lap (or frame start)"""
+        if not self.active:
+            return
+        now = time.perf_counter_ns()
+        self._times[phase] = self._times.get(phase, 0) + (now - self._last)
+        self._last = now
+        if phase not in self.phases:
+            self.phases.append(phase)
+
+    def end_frame(self, **info):
+        """Close the frame; info (e.g. state=...) is added to the trace row"""
+        if not self.active:
+            return
+        now = time.perf_counter_ns()
+        total_ns = now - self._frame_start
+        phase_ms = {p: self._times.get(p, 0) / 1e6 for p in self.phases}
+        self.history.append((total_ns / 1e6, phase_ms))
+        if self.trace_path is not None:
+            self._write_row(now, total_ns, info)
+        self.frame += 1
+        self._times = {}
+        self._frame_start = self._last = now
+
+    # -----------------------------------------------------------------
+    # Traces
+    # -----------------------------------------------------------------
+    def _write_row(self, now, total_ns, info):
+        row = {"frame": self.frame, "t_ms": round(self._frame_start / 1e6, 3),
+               "total_us": total_ns // 1000}
+        for p in self.phases:
+            row[f"{p}_us"] = self._times.get(p, 0) // 1000
+        row.update(info)
+
+        if self.trace_path.suffix.lower() == ".json":
+            self._trace_rows.append(row)
+            return
+        if self._csv is None:
+            self._csv_file = open(self.trace_path, "w", newline="", encoding="utf-8")
+            self._csv = csv.DictWriter(self._csv_file, fieldnames=list(row), extrasaction="ignore")
+            self._csv.writeheader()
+        self._csv.writerow(row)
+
+    def close(self):
+        """Flush the trace file, if any"""
+        if self.trace_path is None:
+            return
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = self._csv = None
+        elif self._trace_rows:
+            with open(self.trace_path, "w", encoding="utf-8") as f:
+                json.dump({"budget_ms": BUDGET_MS, "frames": self._trace_rows}, f)
+        print(f"Frame trace written to {self.trace_path}")
+
+    # -----------------------------------------------------------------
+    # Overlay
+    # -----------------------------------------------------------------
+    def summary(self):
+        """(mean frame ms, worst frame ms, {phase: mean ms}) over the history"""
+        if not self.history:
+            return 0.0, 0.0, {}
+        totals = [t for t, _ in self.history]
+        means = {p: sum(ph.get(p, 0.0) for _, ph in self.history) / len(self.history)
+                 for p in self.phases}
+        return sum(totals) / len(totals), max(totals), means
+
+    def draw(self, surface, font, pos=(10, 100), size=(240, 80), extra=None):
+        """Draw the overlay; returns the covered Rect (for dirty rects)
+
+        extra: optional callable returning more lines of text to show
+        """
+        if not self.enabled:
+            return None
+        x, y = pos
+        w, h = size
+        if self._labels_frame is None or self.frame - self._labels_frame >= 20:
+            mean, worst, means = self.summary()
+            lines = [f"frame {mean:.2f} avg / {worst:.2f} max ms"]
+            lines += [f"{p} {ms:.2f} ms" for p, ms in means.items()]
+            if extra is not None:
+                lines += extra()
+            self._labels = [font.render(line, True, (255, 255, 255)) for line in lines]
+            self._labels_frame = self.frame
+        line_h = font.get_linesize()
+        text_w = max(label.get_width() for label in self._labels) + 8
+        panel = pygame.Rect(x, y, max(w, text_w), h + line_h * len(self._labels) + 6)
+
+        pygame.draw.rect(surface, (0, 0, 0), panel)
+        # Graph scale: twice the budget fills the height
+        scale = h / (2 * BUDGET_MS)
+        step = w / max(1, self.history.maxlen - 1)
+        for i, (total, _) in enumerate(self.history):
+            bar = min(h, int(total * scale))
+            colour = (80, 220, 120) if total <= BUDGET_MS else (240, 80, 80)
+            px = x + int(i * step)
+            pygame.draw.line(surface, colour, (px, y + h - 1), (px, y + h - 1 - bar))
+        budget_y = y + h - int(BUDGET_MS * scale)
+        pygame.draw.line(surface, (200, 200, 200), (x, budget_y), (x + w - 1, budget_y))
+
+        ty = y + h + 4
+        for label in self._labels:
+            surface.blit(label, (x + 4, ty))
+            ty += line_h
+        return panel
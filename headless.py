@@ -0,0 +1,109 @@
+"""Run the game simulation with no window.
+
+Drives simulation.GameState with scripted input as fast as the CPU allows,
+answering questions automatically and starting a new run whenever one ends.
+Useful for smoke tests, CI and benchmarking the simulation on its own.
+
+    python headless.py --ticks 100000 --policy random --seed 1
+
+pygame is only used for Rects here, but SDL's dummy video driver is selected
+anyway so nothing can open a window.
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from simulation import BASE_H, BASE_W, NO_INPUT, TICK_HZ, GameState
+
+
+def policy_idle(tick, rng):
+    return NO_INPUT
+
+
+def policy_right(tick, rng):
+    """Run right, jumping every half second and firing whenever possible"""
+    return {"left": False, "right": True, "jump": tick % 30 == 0, "attack": True}
+
+
+def policy_patrol(tick, rng):
+    """Sweep left and right across the level, jumping and firing"""
+    right = (tick // 150) % 2 == 0
+    return {"left": not right, "right": right, "jump": tick % 40 == 0, "attack": True}
+
+
+def policy_random(tick, rng):
+    return {"left": rng.random() < 0.3, "right": rng.random() < 0.6,
+            "jump": rng.random() < 0.05, "attack": rng.random() < 0.2}
+
+
+POLICIES = {"idle": policy_idle, "right": policy_right, "patrol": policy_patrol,
+            "random": policy_random}
+
+
+def choose_answer(sim, mode, rng):
+    if mode == "correct":
+        return sim.q_correct_idx
+    if mode == "wrong":
+        return (sim.q_correct_idx + 1) % len(sim.q_answers)
+    return rng.randrange(len(sim.q_answers))
+
+
+def run(ticks, size=(BASE_W, BASE_H), policy="patrol", answers="correct", seed=None, levels=None):
+    """Simulate `ticks` ticks; returns a summary dict"""
+    rng = random.Random(seed)
+    act = POLICIES[policy]
+    results = []
+
+    sim = GameState(size, levels, seed=rng.getrandbits(32))
+    sim.start_run()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if sim.mode == "question":
+            sim.answer(choose_answer(sim, answers, rng))
+        elif sim.mode in ("win", "game_over"):
+            sim = GameState(size, sim.levels, seed=rng.getrandbits(32))
+            sim.start_run()
+        sim.step(act(sim.tick, rng))
+        for ev in sim.events:
+            if ev[0] == "finished":
+                results.append({"outcome": ev[1], "time_s": round(ev[2], 3)})
+        sim.events.clear()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "ticks": ticks,
+        "seconds": round(elapsed, 3),
+        "ticks_per_second": round(ticks / elapsed) if elapsed > 0 else None,
+        "realtime_factor": round(ticks / TICK_HZ / elapsed, 1) if elapsed > 0 else None,
+        "runs": results,
+        "final": {"mode": sim.mode, "level": sim.level_index, "lives": sim.lives},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the WASK simulation without a window")
+    parser.add_argument("--ticks", type=int, default=TICK_HZ * 600)
+    parser.add_argument("--size", default=f"{BASE_W}x{BASE_H}", help="simulated screen size, WxH")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="patrol")
+    parser.add_argument("--answers", choices=["correct", "wrong", "random"], default="correct")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    summary = run(args.ticks, (w, h), args.policy, args.answers, args.seed)
+
+    print(f"{summary['ticks']} ticks in {summary['seconds']}s "
+          f"({summary['ticks_per_second']} ticks/s, {summary['realtime_factor']}x real time)")
+    wins = sum(1 for r in summary["runs"] if r["outcome"] == "win")
+    print(f"Runs finished: {len(summary['runs'])} ({wins} won)")
+    for r in summary["runs"][:10]:
+        print(f"  {r['outcome']:4} {r['time_s']:.2f}s")
+    print("Final state:", summary["final"])
+
+
+if __name__ == "__main__":
+    main()
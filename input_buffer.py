@@ -0,0 +1,126 @@
+"""Event-driven input for Cyber_game.py.
+
+Polling key.get_pressed() once a frame misses taps that start and end
+between two frames, and can't tell a new press from a held key. The
+InputBuffer instead takes every KEYDOWN/KEYUP and JOYBUTTONDOWN/JOYBUTTONUP
+from the main loop's event list, tracks held state from them, and queues
+each press (with its time) until a simulation tick uses it. The press
+edges reach the simulation through tick_inputs():
+
+    left/right/attack   held, or pressed since the last tick (so a tap
+                        always counts for at least one tick)
+    jump                press edges only: one jump per press
+    start               for menus; taken with take_press()
+
+Latency is measured per source (keyboard / controller) from the moment the
+game dequeues a press to the end of the present that first shows its tick.
+pygame events carry no timestamp, so time spent in the OS queue before
+that (up to a frame) isn't included.
+"""
+import time
+from collections import deque
+
+import pygame
+
+
+class InputBuffer:
+    def __init__(self, keys, buttons, samples=1000):
+        """keys / buttons: {action: [key codes]} / {action: [button numbers]}"""
+        self.key_actions = {k: a for a, codes in keys.items() for k in codes}
+        self.button_actions = {b: a for a, codes in buttons.items() for b in codes}
+        self._held = {}             # (source, code) -> action
+        self._presses = []          # (action, source, t_ns) not yet used by a tick
+        self._shown = []            # (source, t_ns) used by a tick, not yet presented
+        self.latency = {"keyboard": deque(maxlen=samples), "controller": deque(maxlen=samples)}
+
+    # -----------------------------------------------------------------
+    # Events
+    # -----------------------------------------------------------------
+    def handle(self, ev):
+        """Feed one pygame event; returns True if it was a mapped input"""
+        if ev.type in (pygame.KEYDOWN, pygame.KEYUP):
+            source, code, action = "keyboard", ev.key, self.key_actions.get(ev.key)
+            down = ev.type == pygame.KEYDOWN
+        elif ev.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+            source, code, action = "controller", ev.button, self.button_actions.get(ev.button)
+            down = ev.type == pygame.JOYBUTTONDOWN
+        elif ev.type in (pygame.WINDOWFOCUSLOST, pygame.JOYDEVICEREMOVED):
+            # Key-ups won't arrive for keys released while we can't see them
+            self._held.clear()
+            return False
+        else:
+            return False
+        if action is None:
+            return False
+
+        if down:
+            if (source, code) not in self._held:   # ignore key repeat
+                self._held[(source, code)] = action
+                self._presses.append((action, source, time.perf_counter_ns()))
+        else:
+            self._held.pop((source, code), None)
+        return True
+
+    def take_press(self, action):
+        """True (once) if action was pressed since it was last taken"""
+        for i, (a, _, _) in enumerate(self._presses):
+            if a == action:
+                del self._presses[i]
+                return True
+        return False
+
+    def discard(self):
+        """Forget presses nobody used (e.g. made on a menu or question)"""
+        self._presses = []
+
+    # -----------------------------------------------------------------
+    # Simulation ticks
+    # -----------------------------------------------------------------
+    def tick_inputs(self):
+        """Inputs dict for one simulation tick; uses up the queued presses"""
+        held = set(self._held.values())
+        pressed = set()
+        for action, source, t in self._presses:
+            if action != "start":
+                pressed.add(action)
+                self._shown.append((source, t))
+        self._presses = [p for p in self._presses if p[0] == "start"]
+        return {
+            "left": "left" in held or "left" in pressed,
+            "right": "right" in held or "right" in pressed,
+            "jump": "jump" in pressed,
+            "attack": "attack" in held or "attack" in pressed,
+        }
+
+    def presented(self):
+        """Call right after the frame is presented to record latencies"""
+        if not self._shown:
+            return
+        now = time.perf_counter_ns()
+        for source, t in self._shown:
+            self.latency[source].append((now - t) / 1e6)
+        self._shown = []
+
+    # -----------------------------------------------------------------
+    # Stats
+    # -----------------------------------------------------------------
+    def latency_summary(self):
+        """{source: {count, mean, p50, p95, max}} in ms, for sources with samples"""
+        summary = {}
+        for source, samples in self.latency.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            n = len(ordered)
+            summary[source] = {
+                "count": n,
+                "mean": round(sum(ordered) / n, 2),
+                "p50": round(ordered[n // 2], 2),
+                "p95": round(ordered[min(n - 1, int(n * 0.95))], 2),
+                "max": round(ordered[-1], 2),
+            }
+        return summary
+
+    def latency_lines(self):
+        return [f"{src} input {s['p50']:.1f}/{s['p95']:.1f} ms p50/p95"
+                for src, s in self.latency_summary().items()]
@@ -0,0 +1,172 @@
+"""Level files for Cyber_game.py.
+
+Levels live in levels/*.json in base (800x500) coordinates, one file per
+level, played in file-name order. A LevelSet loads a level only when it is
+first needed. The first load validates the file and scales its geometry
+for the current screen, and the scaled result is cached on disk (marshal)
+per resolution, so later starts skip parsing, validation and scaling.
+With cache_dir=None nothing is read from or written to disk (the server
+uses that when it re-simulates replays at client-chosen sizes).
+"""
+import json
+import marshal
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+import pygame
+
+DEFAULT_LEVEL_DIR = Path(__file__).parent / "levels"
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".asset_cache" / "levels"
+
+# Bump when the cached layout changes so old cache files are ignored
+CACHE_VERSION = 1
+
+ENEMY_SIZE = 40
+COLLECTIBLE_SIZE = 20
+BOSS_KEYS = ("hp", "jump_power", "gravity", "speed_x",
+             "air_hover_ms", "land_cooldown_ms", "touch_damage")
+
+
+def _check_numbers(value, count, where):
+    if (not isinstance(value, list) or len(value) != count
+            or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)):
+        raise ValueError(f"{where}: expected a list of {count} numbers, got {value!r}")
+
+
+def validate_level(data, name="level"):
+    """Raise ValueError if a level dict (base coordinates) is malformed"""
+    if not isinstance(data, dict):
+        raise ValueError(f"{name}: level must be a JSON object")
+    _check_numbers(data.get("spawn"), 2, f"{name}.spawn")
+    for key, count in (("enemies", 4), ("platforms", 4), ("collectibles", 2)):
+        items = data.get(key, [])
+        if not isinstance(items, list):
+            raise ValueError(f"{name}.{key}: expected a list")
+        for i, item in enumerate(items):
+            _check_numbers(item, count, f"{name}.{key}[{i}]")
+    for i, (x, y, lo, hi) in enumerate(data.get("enemies", [])):
+        if lo >= hi:
+            raise ValueError(f"{name}.enemies[{i}]: patrol range {lo}..{hi} is empty")
+    background = data.get("background")
+    if background is not None and not isinstance(background, str):
+        raise ValueError(f"{name}.background: expected a file name")
+    boss = data.get("boss")
+    if boss is not None:
+        if not isinstance(boss, dict):
+            raise ValueError(f"{name}.boss: expected an object or null")
+        missing = [k for k in BOSS_KEYS if k not in boss]
+        if missing:
+            raise ValueError(f"{name}.boss: missing {', '.join(missing)}")
+        if not isinstance(boss["hp"], int) or boss["hp"] <= 0:
+            raise ValueError(f"{name}.boss.hp: expected a positive integer")
+
+
+def scale_level(data, scale):
+    """Base-coordinate level -> plain tuples in screen pixels.
+
+    scale is (Sx, Sy, S), matching sx()/sy()/ss() in Cyber_game.py.
+    """
+    Sx, Sy, S = scale
+
+    def sx(v): return int(v * Sx)
+    def sy(v): return int(v * Sy)
+    def ss(v): return int(v * S)
+
+    boss = data.get("boss")
+    if boss:
+        boss = dict(boss)
+        boss["jump_power"] *= S
+        boss["gravity"] *= S
+        boss["speed_x"] *= S
+
+    return {
+        "spawn": (sx(data["spawn"][0]), sy(data["spawn"][1])),
+        "enemies": [(sx(ex), sy(ey), ss(ENEMY_SIZE), ss(ENEMY_SIZE), sx(lo), sx(hi))
+                    for ex, ey, lo, hi in data.get("enemies", [])],
+        "platforms": [(sx(x), sy(y), sx(w), sy(h)) for x, y, w, h in data.get("platforms", [])],
+        "collectibles": [(sx(x), sy(y), ss(COLLECTIBLE_SIZE), ss(COLLECTIBLE_SIZE))
+                         for x, y in data.get("collectibles", [])],
+        "boss_cfg": boss,
+        "background": data.get("background"),
+    }
+
+
+def to_runtime(scaled):
+    """Scaled tuples -> the dict of pygame.Rects the game works with"""
+    return {
+        "spawn": scaled["spawn"],
+        "enemies": [(pygame.Rect(x, y, w, h), lo, hi) for x, y, w, h, lo, hi in scaled["enemies"]],
+        "platforms": [pygame.Rect(r) for r in scaled["platforms"]],
+        "collectibles": [pygame.Rect(r) for r in scaled["collectibles"]],
+        "boss_cfg": dict(scaled["boss_cfg"]) if scaled["boss_cfg"] else None,
+        "background": scaled["background"],
+    }
+
+
+class LevelSet:
+    """Sequence of levels that are loaded, and cached, on demand"""
+
+    def __init__(self, size, scale, level_dir=DEFAULT_LEVEL_DIR,
+                 cache_dir=DEFAULT_CACHE_DIR, keep_loaded=4):
+        self.size = size
+        self.scale = scale
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.keep_loaded = keep_loaded
+        self.paths = sorted(Path(level_dir).glob("*.json"))
+        if not self.paths:
+            raise FileNotFoundError(f"No level files in {level_dir}")
+        self._loaded = OrderedDict()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def fingerprint(self):
+        """CRC32 of every level file, in play order (replays must match it)"""
+        crc = 0
+        for path in self.paths:
+            crc = zlib.crc32(path.read_bytes(), crc)
+        return crc
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < len(self.paths):
+            raise IndexError(idx)
+        level = self._loaded.get(idx)
+        if level is None:
+            level = to_runtime(self._load_scaled(self.paths[idx]))
+            self._loaded[idx] = level
+            # Only a few levels stay in memory however many ship
+            while len(self._loaded) > self.keep_loaded:
+                self._loaded.popitem(last=False)
+        else:
+            self._loaded.move_to_end(idx)
+        return level
+
+    def _cache_path(self, path):
+        w, h = self.size
+        mtime = int(path.stat().st_mtime)
+        return self.cache_dir / f"{path.stem}_{w}x{h}_{mtime}_v{CACHE_VERSION}.bin"
+
+    def _load_scaled(self, path):
+        cached = self._cache_path(path) if self.cache_dir is not None else None
+        if cached is not None and cached.exists():
+            try:
+                return marshal.loads(cached.read_bytes())
+            except Exception as e:
+                print(f"Ignoring bad level cache {cached.name}:", e)
+
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        validate_level(data, path.name)
+        scaled = scale_level(data, self.scale)
+        if cached is None:
+            return scaled
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_suffix(".tmp")
+            tmp.write_bytes(marshal.dumps(scaled))
+            tmp.replace(cached)
+        except Exception as e:
+            print("Could not write level cache:", e)
+        return scaled
@@ -0,0 +1,164 @@
+"""Memory instrumentation for long kiosk sessions.
+
+Opt-in (Cyber_game.py turns it on with WASK_MEMPROFILE=<directory>). While
+on, tracemalloc traces every allocation, and a snapshot is taken at every
+run start and every `interval` seconds. Each snapshot:
+
+  - adds a row to memory.csv: traced memory and every registered counter
+    (cached text surfaces, baked layers, projectiles, hazards, ...)
+  - writes mem_NNNN.txt: how the counters and the top allocation sites
+    changed since the previous snapshot and since the first one
+
+Something that grows with every start_run/reset_level cycle shows up as a
+counter or an allocation site that never stops climbing.
+
+It can also run the simulation on its own, no window, for a quick check:
+
+    python mem_profiler.py --runs 200 --out memprof
+"""
+import argparse
+import csv
+import linecache
+import time
+import tracemalloc
+from pathlib import Path
+
+# Our own bookkeeping shouldn't show up as a leak
+_IGNORED = (tracemalloc.__file__, linecache.__file__, csv.__file__, "<frozen importlib._bootstrap>",
+            "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+class MemoryProfiler:
+    def __init__(self, out_dir, interval=300.0, top=15, frames=5):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.top = top
+        self.counters = {}
+        self.index = 0
+        self._first = None          # (snapshot, counters)
+        self._previous = None
+        self._last_time = time.monotonic()
+        self._csv_file = None
+        self._csv = None
+        tracemalloc.start(frames)
+
+    def add_counter(self, name, fn):
+        """fn() -> number, sampled at every snapshot (register before the first)"""
+        self.counters[name] = fn
+
+    def maybe_snapshot(self):
+        """Cheap to call every frame; snapshots once `interval` has passed"""
+        if time.monotonic() - self._last_time >= self.interval:
+            self.snapshot("periodic")
+
+    def snapshot(self, reason):
+        self._last_time = time.monotonic()
+        snap = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED])
+        values = {}
+        for name, fn in self.counters.items():
+            try:
+                values[name] = fn()
+            except Exception as e:
+                print(f"Memory counter {name} failed:", e)
+                values[name] = None
+        current, peak = tracemalloc.get_traced_memory()
+
+        self._write_row(reason, current, peak, values)
+        self._write_report(reason, snap, current, peak, values)
+        if self._first is None:
+            self._first = (snap, values)
+        self._previous = (snap, values)
+        self.index += 1
+
+    def _write_row(self, reason, current, peak, values):
+        row = {"index": self.index, "time": time.strftime("%Y-%m-%d %H:%M:%S"), "reason": reason,
+               "traced_kb": current // 1024, "peak_kb": peak // 1024}
+        row.update(values)
+        if self._csv is None:
+            self._csv_file = open(self.out_dir / "memory.csv", "w", newline="", encoding="utf-8")
+            self._csv = csv.DictWriter(self._csv_file, fieldnames=list(row), extrasaction="ignore")
+            self._csv.writeheader()
+        self._csv.writerow(row)
+        self._csv_file.flush()
+
+    def _write_report(self, reason, snap, current, peak, values):
+        lines = [f"Snapshot {self.index} ({reason}) at {time.strftime('%Y-%m-%d %H:%M:%S')}",
+                 f"traced {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB", "", "Counters:"]
+        for name, value in values.items():
+            changes = ""
+            for label, ref in (("previous", self._previous), ("first", self._first)):
+                old = ref[1].get(name) if ref else None
+                if isinstance(value, (int, float)) and isinstance(old, (int, float)):
+                    changes += f"  {value - old:+} vs {label}"
+            lines.append(f"  {name:24} {value}{changes}")
+
+        for label, ref in (("previous", self._previous), ("first", self._first)):
+            if ref is None:
+                continue
+            lines += ["", f"Top growth since the {label} snapshot:"]
+            for stat in snap.compare_to(ref[0], "lineno")[:self.top]:
+                lines.append(f"  {stat}")
+        if self._previous is None:
+            lines += ["", "Largest allocation sites:"]
+            lines += [f"  {stat}" for stat in snap.statistics("lineno")[:self.top]]
+
+        path = self.out_dir / f"mem_{self.index:04d}.txt"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def close(self):
+        """Final snapshot, then stop tracing"""
+        if not tracemalloc.is_tracing():
+            return
+        self.snapshot("exit")
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = self._csv = None
+        tracemalloc.stop()
+        print(f"Memory reports written to {self.out_dir}")
+
+
+def main():
+    import headless
+    from simulation import GameState
+
+    parser = argparse.ArgumentParser(description="Check the simulation for memory growth across runs")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=1200, help="ticks per run")
+    parser.add_argument("--every", type=int, default=10, help="snapshot every N runs")
+    parser.add_argument("--out", default="memprof")
+    args = parser.parse_args()
+
+    import random
+    rng = random.Random(1)
+    state = {"sim": None, "runs": 0, "levels": 0}
+    prof = MemoryProfiler(args.out, interval=float("inf"))
+    prof.add_counter("runs", lambda: state["runs"])
+    prof.add_counter("level_loads", lambda: state["levels"])
+    prof.add_counter("enemy_capacity", lambda: state["sim"].enemies.capacity if state["sim"] else 0)
+    prof.add_counter("projectiles", lambda: state["sim"].projectiles.n if state["sim"] else 0)
+    prof.add_counter("hazards", lambda: state["sim"].hazards.n if state["sim"] else 0)
+    prof.add_counter("sim_events", lambda: len(state["sim"].events) if state["sim"] else 0)
+
+    levels = None
+    for run in range(args.runs):
+        sim = state["sim"] = GameState(levels=levels, seed=rng.getrandbits(32))
+        levels = sim.levels
+        sim.start_run()
+        for tick in range(args.ticks):
+            if sim.mode == "question":
+                sim.answer(headless.choose_answer(sim, "correct", rng))
+            elif sim.mode != "play":
+                sim.respawn()
+            sim.step(headless.policy_patrol(tick, rng))
+            state["levels"] += sum(1 for ev in sim.events if ev[0] == "level")
+            sim.events.clear()
+        state["runs"] = run + 1
+        if run % args.every == 0:
+            prof.snapshot(f"run {run + 1}")
+    prof.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Adaptive quality for Cyber_game.py.
+
+The governor is fed the busy time of every gameplay frame (the time spent
+working, not waiting for the frame clock). Every `window` frames it looks at
+the 90th percentile: over the 60 FPS budget and it applies the next quality
+step, comfortably under it for a few windows in a row and it undoes the
+last one. Steps are (name, lower, restore) callables supplied by the game,
+ordered so the least noticeable goes first.
+
+Every decision is printed, kept in `decisions`, and appended to log_path if
+one is given.
+"""
+import time
+
+from frame_profiler import BUDGET_MS
+
+
+class QualityGovernor:
+    def __init__(self, steps, budget_ms=BUDGET_MS, window=90, headroom=0.6,
+                 up_after=3, log_path=None):
+        self.steps = list(steps)
+        self.budget_ms = budget_ms
+        self.window = window
+        self.headroom = headroom    # restore when p90 is under this share of the budget
+        self.up_after = up_after    # ...for this many windows in a row
+        self.log_path = log_path
+        self.level = 0              # how many steps are applied
+        self.decisions = []
+        self._frames = []
+        self._calm = 0
+
+    @property
+    def active_steps(self):
+        return [name for name, _, _ in self.steps[:self.level]]
+
+    def frame(self, busy_ms):
+        """Record one frame; returns the step name if quality changed"""
+        self._frames.append(busy_ms)
+        if len(self._frames) < self.window:
+            return None
+        frames = sorted(self._frames)
+        self._frames = []
+        p90 = frames[int(len(frames) * 0.9)]
+
+        if p90 > self.budget_ms:
+            self._calm = 0
+            if self.level < len(self.steps):
+                name, lower, _ = self.steps[self.level]
+                lower()
+                self.level += 1
+                self._log("lower", name, p90)
+                return name
+        elif p90 < self.budget_ms * self.headroom:
+            self._calm += 1
+            if self._calm >= self.up_after and self.level > 0:
+                self._calm = 0
+                self.level -= 1
+                name, _, restore = self.steps[self.level]
+                restore()
+                self._log("restore", name, p90)
+                return name
+        else:
+            self._calm = 0
+        return None
+
+    def _log(self, action, name, p90):
+        entry = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "action": action,
+                 "step": name, "p90_ms": round(p90, 2), "level": self.level}
+        self.decisions.append(entry)
+        print(f"Quality {action}: {name} (p90 frame {p90:.1f} ms, budget {self.budget_ms:.1f} ms)")
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(f"{entry['time']} {action} {name} p90={entry['p90_ms']}ms level={self.level}\n")
+            except OSError as e:
+                print("Could not write quality log:", e)
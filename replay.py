@@ -0,0 +1,355 @@
+"""Compact replays of game runs.
+
+A replay is everything GameState needs to re-run a session exactly: screen
+size (the simulation works in screen pixels), the RNG seed used for question
+picks, a fingerprint of the level files, the level the run started on, and
+an op stream:
+
+    input run   the 4-bit left/right/jump/attack field and how many ticks it
+                was held (runs of identical ticks are one op)
+    answer      the choice made on a question screen
+    respawn     "Respawn" picked on the game-over screen
+    level       a level was loaded (checked on playback)
+    finish      the run ended: outcome and run length in ticks (checked)
+
+The op stream is varint-packed and zlib-compressed, so a few minutes of play
+comes to a few hundred bytes. play() re-runs a replay as fast as the CPU
+allows and reports whether it reproduced the recorded results.
+
+    python replay.py replays/some_run.wrpl
+"""
+import hashlib
+import struct
+import sys
+import time
+import zlib
+
+from simulation import TICK_HZ, GameState
+
+MAGIC = b"WASKRPL1"
+VERSION = 2
+HEADER = struct.Struct("<8sBHHQI")   # magic, version, width, height, seed, level crc
+# Version 2 adds the start level, so a retry from a later level is its own replay
+START_LEVEL = struct.Struct("<B")
+
+INPUT_KEYS = ("left", "right", "jump", "attack")
+
+OP_INPUT = 0x00     # low nibble: input bits; then varint tick count
+OP_ANSWER = 0x10    # low nibble: choice index
+OP_RESPAWN = 0x20
+OP_LEVEL = 0x30     # then varint level index
+OP_FINISH = 0x40    # low nibble: 1 win / 0 lose; then varint run ticks
+
+# Screen sizes a replay may claim: half the 800x500 base size up to an 8K
+# display
+MIN_SIZE = (400, 250)
+MAX_SIZE = (7680, 4320)
+
+# Decompressed op stream limit: an hour of input changing every tick is ~450 KB
+MAX_OPS_BYTES = 1024 * 1024
+# A tick can be followed by at most a level load, a finish, an answer and a respawn
+MAX_OPS_PER_TICK = 4
+
+# Every possible inputs dict, indexed by its bits
+INPUTS_BY_BITS = [{k: bool(bits >> i & 1) for i, k in enumerate(INPUT_KEYS)} for bits in range(16)]
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def pack_inputs(inputs):
+    bits = 0
+    for i, k in enumerate(INPUT_KEYS):
+        if inputs[k]:
+            bits |= 1 << i
+    return bits
+
+
+def _put_varint(buf, n):
+    while n >= 0x80:
+        buf.append(n & 0x7F | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _get_varint(data, pos):
+    n = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("truncated replay")
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+        if shift > 35:
+            raise ReplayError("corrupt replay: varint too long")
+
+
+def parse_ops(data):
+    """Decode an op stream into (kind, low nibble, argument) tuples.
+
+    Raises ReplayError for anything a recorder could not have written.
+    """
+    pos = 0
+    while pos < len(data):
+        op = data[pos]
+        pos += 1
+        kind, low, arg = op & 0xF0, op & 0x0F, None
+        if kind in (OP_INPUT, OP_LEVEL, OP_FINISH):
+            arg, pos = _get_varint(data, pos)
+            if kind == OP_INPUT and arg == 0:
+                raise ReplayError("input op held for zero ticks")
+        elif kind not in (OP_ANSWER, OP_RESPAWN):
+            raise ReplayError(f"unknown op 0x{op:02x}")
+        yield kind, low, arg
+
+
+class ReplayRecorder:
+    """Drive a GameState through this and it logs what a replay needs.
+
+    Use start_run/step/answer/respawn instead of the GameState methods of
+    the same name; sim.events is left for the caller to handle as usual.
+    """
+
+    def __init__(self, sim, level_crc=0):
+        self.sim = sim
+        self.level_crc = level_crc
+        self.ops = bytearray()
+        self.start_level = 0
+        self._bits = None
+        self._count = 0
+
+    def _flush_inputs(self):
+        if self._count:
+            self.ops.append(OP_INPUT | self._bits)
+            _put_varint(self.ops, self._count)
+        self._bits = None
+        self._count = 0
+
+    def _log_events(self, first):
+        for ev in self.sim.events[first:]:
+            if ev[0] == "level":
+                self.ops.append(OP_LEVEL)
+                _put_varint(self.ops, ev[1])
+            elif ev[0] == "finished":
+                self.ops.append(OP_FINISH | (1 if ev[1] == "win" else 0))
+                _put_varint(self.ops, self.sim.tick - self.sim.run_start_tick)
+
+    def start_run(self, level=0):
+        self.start_level = level
+        first = len(self.sim.events)
+        self.sim.start_run(level)
+        self._log_events(first)
+
+    def step(self, inputs):
+        bits = pack_inputs(inputs)
+        if bits != self._bits:
+            self._flush_inputs()
+            self._bits = bits
+        self._count += 1
+
+        first = len(self.sim.events)
+        self.sim.step(inputs)
+        if len(self.sim.events) > first:
+            self._flush_inputs()
+            self._log_events(first)
+
+    def answer(self, choice):
+        self._flush_inputs()
+        self.ops.append(OP_ANSWER | (choice & 0x0F))
+        first = len(self.sim.events)
+        self.sim.answer(choice)
+        self._log_events(first)
+
+    def respawn(self):
+        self._flush_inputs()
+        self.ops.append(OP_RESPAWN)
+        first = len(self.sim.events)
+        self.sim.respawn()
+        self._log_events(first)
+
+    def to_bytes(self):
+        self._flush_inputs()
+        header = HEADER.pack(MAGIC, VERSION, self.sim.width, self.sim.height,
+                             self.sim.seed, self.level_crc)
+        return header + START_LEVEL.pack(self.start_level) + zlib.compress(bytes(self.ops), 9)
+
+    def save(self, path):
+        data = self.to_bytes()
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+
+class Replay:
+    def __init__(self, size, seed, level_crc, ops, start_level=0):
+        self.size = size
+        self.seed = seed
+        self.level_crc = level_crc
+        self.ops = ops
+        self.start_level = start_level
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ReplayError("not a replay (too short)")
+        magic, version, w, h, seed, crc = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("not a replay (bad magic)")
+        if version not in (1, VERSION):
+            raise ReplayError(f"unsupported replay version {version}")
+        if not (MIN_SIZE[0] <= w <= MAX_SIZE[0] and MIN_SIZE[1] <= h <= MAX_SIZE[1]):
+            raise ReplayError(f"unsupported replay screen size {w}x{h}")
+        pos, start_level = HEADER.size, 0
+        if version >= 2:
+            if len(data) < pos + START_LEVEL.size:
+                raise ReplayError("not a replay (too short)")
+            start_level, = START_LEVEL.unpack_from(data, pos)
+            pos += START_LEVEL.size
+
+        # Bounded: a small payload of zeros can inflate to hundreds of MB
+        inflater = zlib.decompressobj()
+        try:
+            ops = inflater.decompress(data[pos:], MAX_OPS_BYTES)
+        except zlib.error as e:
+            raise ReplayError(f"corrupt replay: {e}") from None
+        if inflater.unconsumed_tail:
+            raise ReplayError(f"replay ops exceed {MAX_OPS_BYTES} bytes")
+        if not inflater.eof or inflater.unused_data:
+            raise ReplayError("corrupt replay: truncated or trailing data")
+        return cls((w, h), seed, crc, ops, start_level)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def fingerprint(self):
+        """sha256 hex of the run itself, not of how it was packed.
+
+        Covers size, seed, start level and the ops, re-encoded with adjacent
+        input runs of the same keys merged, so recompressing a replay, using
+        the version 1 header or splitting its runs gives the same digest.
+        The level crc is left out: 0 just means "not recorded".
+        """
+        canon = bytearray(struct.pack("<HHQB", *self.size, self.seed, self.start_level))
+        bits, count = None, 0
+        for kind, low, arg in parse_ops(self.ops):
+            if kind == OP_INPUT and low == bits:
+                count += arg
+                continue
+            if count:
+                canon.append(OP_INPUT | bits)
+                _put_varint(canon, count)
+            bits, count = None, 0
+            if kind == OP_INPUT:
+                bits, count = low, arg
+                continue
+            canon.append(kind | low)
+            if arg is not None:
+                _put_varint(canon, arg)
+        if count:
+            canon.append(OP_INPUT | bits)
+            _put_varint(canon, count)
+        return hashlib.sha256(canon).hexdigest()
+
+
+def play(replay, levels=None, max_ticks=None, level_cache=True):
+    """Re-run a replay headlessly; returns a result dict.
+
+    level_cache=False keeps the scaled levels in memory only, for callers
+    (the server) that shouldn't write a cache file per replayed screen size.
+
+    result["ok"] is False (with result["error"]) if the simulation diverged
+    from what was recorded, e.g. different level files or game rules.
+    """
+    result = {"ok": True, "error": None, "ticks": 0, "runs": [], "levels": []}
+
+    def fail(msg):
+        result.update(ok=False, error=msg)
+        return result
+
+    # Check the whole stream before simulating any of it
+    total_ticks = op_count = 0
+    for kind, _, arg in parse_ops(replay.ops):
+        op_count += 1
+        if kind == OP_INPUT:
+            total_ticks += arg
+    if max_ticks is not None and total_ticks > max_ticks:
+        return fail("replay is longer than allowed")
+    if op_count > MAX_OPS_PER_TICK * (total_ticks + 1):
+        return fail("replay has more ops than its ticks allow")
+
+    sim = GameState(replay.size, levels, seed=replay.seed, level_cache=level_cache)
+    if replay.level_crc and hasattr(sim.levels, "fingerprint") \
+            and sim.levels.fingerprint() != replay.level_crc:
+        return fail("level files differ from the recording")
+    if replay.start_level >= len(sim.levels):
+        return fail(f"replay starts on level {replay.start_level}, which doesn't exist")
+
+    finished = []    # finish events seen by the simulation, not yet checked
+    levels_seen = []
+
+    def drain():
+        for ev in sim.events:
+            if ev[0] == "finished":
+                finished.append((ev[1], sim.tick - sim.run_start_tick))
+            elif ev[0] == "level":
+                levels_seen.append(ev[1])
+        sim.events.clear()
+
+    sim.start_run(replay.start_level)
+    drain()
+    for kind, low, arg in parse_ops(replay.ops):
+        if kind == OP_INPUT:
+            inputs = INPUTS_BY_BITS[low]
+            for _ in range(arg):
+                sim.step(inputs)
+            result["ticks"] += arg
+            drain()
+        elif kind == OP_ANSWER:
+            if sim.mode != "question":
+                return fail(f"answer at tick {sim.tick} with no question open")
+            sim.answer(low)
+            drain()
+        elif kind == OP_RESPAWN:
+            if sim.mode != "game_over":
+                return fail(f"respawn at tick {sim.tick} while still playing")
+            sim.respawn()
+            drain()
+        elif kind == OP_LEVEL:
+            if not levels_seen or levels_seen.pop(0) != arg:
+                return fail(f"level {arg} was not loaded at tick {sim.tick}")
+            result["levels"].append(arg)
+        elif kind == OP_FINISH:
+            outcome = "win" if low else "lose"
+            if not finished or finished.pop(0) != (outcome, arg):
+                return fail(f"recorded {outcome} after {arg} ticks did not happen")
+            result["runs"].append({"outcome": outcome, "time_s": arg / TICK_HZ})
+
+    if finished:
+        return fail("simulation finished a run the recording doesn't have")
+    return result
+
+
+def main(paths):
+    for path in paths:
+        replay = Replay.load(path)
+        start = time.perf_counter()
+        result = play(replay)
+        elapsed = time.perf_counter() - start
+        speed = result["ticks"] / TICK_HZ / elapsed if elapsed > 0 else 0
+        status = "OK" if result["ok"] else f"MISMATCH: {result['error']}"
+        print(f"{path}: {status} - {result['ticks']} ticks in {elapsed:.2f}s ({speed:.0f}x real time)")
+        for run in result["runs"]:
+            print(f"  {run['outcome']:4} {run['time_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python replay.py REPLAY_FILE...")
+        sys.exit(2)
+    main(sys.argv[1:])
@@ -0,0 +1,180 @@
+"""Server-side verification of submitted runs.
+
+A submission can carry the replay the game recorded (see replay.py). The
+server stores it, marks the score "pending" and hands it to a
+ReplayVerifier, which re-simulates it in a small pool of worker processes
+so request handlers never wait on it. A score is
+"verified" if the replay reproduces the claimed outcome and time, and
+"rejected" otherwise.
+
+The simulation needs pygame and numpy. Without them the verifier reports
+itself unavailable and replays simply stay pending.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+MAX_REPLAY_BYTES = 256 * 1024
+# Longest run we are willing to simulate (one hour of play)
+MAX_REPLAY_TICKS = 60 * 60 * 60
+
+# Each worker imports pygame and numpy, and gunicorn starts a pool in every
+# worker process, so by default a pool has at most this many (a 512 MB
+# instance can't hold one per host CPU); VERIFY_WORKERS sets it on the server
+DEFAULT_MAX_WORKERS = 2
+
+PENDING = "pending"
+VERIFIED = "verified"
+REJECTED = "rejected"
+
+try:
+    import replay as _replay
+except ImportError as e:   # pygame / numpy not installed on this server
+    _replay = None
+    UNAVAILABLE_REASON = str(e)
+else:
+    UNAVAILABLE_REASON = None
+
+
+def replay_fingerprint(data):
+    """Digest identifying the run in a replay, however it was packed;
+    ValueError if the replay can't be parsed.
+
+    Without the simulation modules only the raw bytes can be hashed (such
+    replays stay pending anyway).
+    """
+    if _replay is None:
+        return hashlib.sha256(data).hexdigest()
+    return _replay.Replay.from_bytes(data).fingerprint()
+
+
+def verify_replay(data, time_s, outcome):
+    """Re-run a replay and compare with the claimed result; -> (status, detail)
+
+    Runs inside a worker process.
+    """
+    try:
+        result = _replay.play(_replay.Replay.from_bytes(data), max_ticks=MAX_REPLAY_TICKS,
+                              level_cache=False)
+    except _replay.ReplayError as e:
+        return REJECTED, str(e)
+    except Exception as e:
+        return REJECTED, f"replay crashed the simulation: {e}"
+    if not result["ok"]:
+        return REJECTED, result["error"]
+    if not result["runs"]:
+        return REJECTED, "replay has no finished run"
+
+    # The game records each attempt separately, but a replay driven through
+    # ReplayRecorder.respawn() can hold several runs; the submitted one is last
+    last = result["runs"][-1]
+    tick = 1 / 60
+    if last["outcome"] != outcome or abs(last["time_s"] - float(time_s)) > tick / 2:
+        return REJECTED, (f"replay ends in {last['outcome']} after {last['time_s']:.2f}s, "
+                          f"claimed {outcome} after {float(time_s):.2f}s")
+    return VERIFIED, f"{result['ticks']} ticks re-simulated"
+
+
+def default_workers():
+    """Pool size: the CPUs this process may use, at most DEFAULT_MAX_WORKERS"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:   # not available on macOS / Windows
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, DEFAULT_MAX_WORKERS))
+
+
+class ReplayVerifier:
+    def __init__(self, db_path, workers=None, on_update=None):
+        """on_update(score_id, board, status) runs after a result is stored"""
+        self.db_path = db_path
+        self.workers = workers or default_workers()
+        self.on_update = on_update
+        self._pool = None
+        self._lock = threading.Lock()
+        self._requeue_lock = None
+        self.completed = 0
+
+    @property
+    def available(self):
+        return _replay is not None
+
+    def _get_pool(self):
+        # Started on first use so importing the server doesn't fork workers
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def submit(self, score_id, board, data, time_s, outcome):
+        """Queue one replay; returns immediately"""
+        if not self.available:
+            return False
+        future = self._get_pool().submit(verify_replay, data, time_s, outcome)
+        future.add_done_callback(lambda f: self._finish(score_id, board, f))
+        return True
+
+    def _finish(self, score_id, board, future):
+        try:
+            status, detail = future.result()
+        except Exception as e:
+            # A dead worker is our problem, not the player's; leave it pending
+            print(f"❌ Replay verification failed for score {score_id}: {e}")
+            return
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("UPDATE scores SET verification = ? WHERE id = ?", (status, score_id))
+            conn.execute("UPDATE replays SET detail = ? WHERE score_id = ?", (detail, score_id))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"❌ Could not store verification for score {score_id}: {e}")
+            print(traceback.format_exc())
+            return
+        self.completed += 1
+        print(f"{'✅' if status == VERIFIED else '🚫'} Score {score_id} {status}: {detail}")
+        if self.on_update:
+            self.on_update(score_id, board, status)
+
+    def _claim_requeue(self):
+        """True in the first process to ask; it holds the lock until it exits"""
+        try:
+            import fcntl
+        except ImportError:   # Windows: the dev server is a single process
+            return True
+        f = open(f"{self.db_path}.requeue.lock", "w")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._requeue_lock = f
+        return True
+
+    def requeue_pending(self):
+        """Queue replays left pending by a restart; returns how many.
+
+        gunicorn imports the server once per worker, so only the first
+        worker to get here does the requeue; the others return 0.
+        """
+        if not self.available or not self._claim_requeue():
+            return 0
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("""
+            SELECT s.id, s.board, r.data, s.time_s, s.outcome
+            FROM scores s JOIN replays r ON r.score_id = s.id
+            WHERE s.verification = ?
+        """, (PENDING,)).fetchall()
+        conn.close()
+        for score_id, board, data, time_s, outcome in rows:
+            self.submit(score_id, board, data, time_s, outcome)
+        return len(rows)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
@@ -0,0 +1,71 @@
+"""Fixed-resolution rendering for Cyber_game.py.
+
+By default the game draws straight to the fullscreen display at its native
+size. In a fixed mode everything is drawn into a BASE_W x BASE_H offscreen
+surface instead (so sx/sy/ss are all 1) and each frame is presented with a
+single scaled blit:
+
+    scaled    nearest-neighbour stretch to the whole display (cheapest)
+    smooth    bilinear stretch to the whole display
+    integer   largest whole-number multiple that fits, centred, black bars
+
+Mouse positions from events are in display pixels; to_render() maps them
+back to render-surface pixels.
+"""
+import pygame
+
+MODES = ("native", "scaled", "smooth", "integer")
+
+
+class ScaledDisplay:
+    def __init__(self, display, render_size, mode="scaled"):
+        if mode not in MODES:
+            raise ValueError(f"unknown render mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.display = display
+        self.mode = mode
+        if mode == "native":
+            self.surface = display
+            self.dest = display.get_rect()
+        else:
+            self.surface = pygame.Surface(render_size).convert()
+            self.set_mode(mode)
+
+    @property
+    def fixed(self):
+        return self.mode != "native"
+
+    def set_mode(self, mode):
+        """Switch between the fixed modes (not to or from native)"""
+        if not self.fixed or mode not in MODES[1:]:
+            raise ValueError(f"cannot switch {self.mode} rendering to {mode}")
+        self.mode = mode
+        dw, dh = self.display.get_size()
+        rw, rh = self.surface.get_size()
+        if mode == "integer":
+            factor = max(1, min(dw // rw, dh // rh))
+            self.dest = pygame.Rect(0, 0, rw * factor, rh * factor)
+            self.dest.center = (dw // 2, dh // 2)
+        else:
+            self.dest = pygame.Rect(0, 0, dw, dh)
+        self.display.fill((0, 0, 0))
+        self._target = self.display.subsurface(self.dest)
+
+    def to_render(self, pos):
+        """Display pixel -> render-surface pixel (clamped to the surface)"""
+        if not self.fixed:
+            return pos
+        rw, rh = self.surface.get_size()
+        x = (pos[0] - self.dest.x) * rw // self.dest.width
+        y = (pos[1] - self.dest.y) * rh // self.dest.height
+        return min(max(x, 0), rw - 1), min(max(y, 0), rh - 1)
+
+    def mouse_pos(self):
+        return self.to_render(pygame.mouse.get_pos())
+
+    def present(self):
+        """Scale the frame to the display (fixed modes) and flip"""
+        if self.mode == "smooth":
+            pygame.transform.smoothscale(self.surface, self.dest.size, self._target)
+        elif self.fixed:
+            pygame.transform.scale(self.surface, self.dest.size, self._target)
+        pygame.display.flip()
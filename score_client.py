@@ -0,0 +1,251 @@
+"""Leaderboard client used by Cyber_game.py.
+
+Results are posted from a background thread so the game loop never waits on
+the network. The UI reads `status` each frame to show progress.
+
+Every result is appended (and fsync'd) to a local spool file before
+submit() returns, and only removed once the server has accepted it, so runs
+survive bad wifi, a sleeping server, quitting straight away and restarts of
+the game. The worker only drains the spool, in batches with exponential
+backoff.
+
+All requests share one keep-alive session. `warm_up()` pings /health ahead of
+time (menu / name entry) so a sleeping Render instance is already awake and
+the TLS connection is already open when the real result is posted.
+"""
+import base64
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+
+STATUS_IDLE = "idle"
+STATUS_SUBMITTING = "submitting"
+STATUS_SAVED = "saved"
+STATUS_REJECTED = "rejected"
+STATUS_OFFLINE = "offline"
+
+STATUS_TEXT = {
+    STATUS_IDLE: "",
+    STATUS_SUBMITTING: "Submitting score…",
+    STATUS_SAVED: "Score saved!",
+    STATUS_REJECTED: "Score rejected by the leaderboard",
+    STATUS_OFFLINE: "Offline - score kept, will retry",
+}
+
+# Same slug rule as server.py's valid_board()
+BOARD_RE = re.compile(r"^[A-Za-z0-9_-]{1,40}$")
+
+DEFAULT_SPOOL_PATH = Path(__file__).parent / "score_spool.jsonl"
+
+BATCH_SIZE = 50
+BACKOFF_MIN_S = 2.0
+BACKOFF_MAX_S = 300.0
+
+# Render free instances sleep after ~15 minutes idle; re-ping well before that
+WARMUP_INTERVAL_S = 120.0
+WARMUP_TIMEOUT_S = 60.0
+
+_WARM_UP = object()
+_SPOOLED = object()
+
+
+class ScoreSubmitter:
+    """Posts results to the leaderboard from a daemon worker thread"""
+
+    def __init__(self, base_url, board="main", timeout=5.0, spool_path=DEFAULT_SPOOL_PATH,
+                 batch_delay=0.0):
+        if not isinstance(board, str) or not BOARD_RE.match(board):
+            raise ValueError(f"invalid leaderboard board {board!r} (letters, digits, _ and -, "
+                             f"at most 40)")
+        self.base_url = base_url.rstrip("/")
+        self.board = board
+        self.timeout = timeout
+        # Seconds to hold a fresh result so others can join its batch
+        self.batch_delay = batch_delay
+        self.spool_path = Path(spool_path)
+        self.status = STATUS_IDLE
+        self._queue = queue.Queue()
+        # Appends (caller's thread) vs rewrites after a send (worker)
+        self._spool_lock = threading.Lock()
+        self._backoff = 0.0
+        self._next_attempt = 0.0
+        self._last_warm_up = None
+        # Only the worker thread uses the session (created there, see _run)
+        self._session = None
+        self._worker = threading.Thread(target=self._run, name="score-submitter", daemon=True)
+        self._worker.start()
+
+    def _url(self, endpoint):
+        if self.board == "main":
+            return f"{self.base_url}/{endpoint}"
+        return f"{self.base_url}/b/{self.board}/{endpoint}"
+
+    def submit(self, name, email, time_s, outcome, replay=None):
+        """Queue a result; returns immediately. replay: recorded run bytes"""
+        payload = {
+            "submission_id": uuid.uuid4().hex,
+            "name": name or "Player",
+            "email": email or "",
+            "time_s": float(time_s),
+            "outcome": outcome,
+        }
+        if replay:
+            # The server re-simulates it to verify the time
+            payload["replay"] = base64.b64encode(replay).decode("ascii")
+        self.forward(payload)
+
+    def forward(self, payload):
+        """Spool an already-built result payload (keeps its submission_id)"""
+        self._append_spool(payload)
+        self.status = STATUS_SUBMITTING
+        self._queue.put(_SPOOLED)
+
+    def warm_up(self):
+        """Wake the server and open a connection; cheap to call every frame"""
+        now = time.monotonic()
+        if self._last_warm_up is not None and now - self._last_warm_up < WARMUP_INTERVAL_S:
+            return
+        self._last_warm_up = now
+        self._queue.put(_WARM_UP)
+
+    def status_text(self):
+        return STATUS_TEXT.get(self.status, "")
+
+    def pending(self):
+        """Number of results waiting in the spool"""
+        return len(self._read_spool())
+
+    # -----------------------------------------------------------------
+    # Spool file (one JSON result per line, appended before sending)
+    # -----------------------------------------------------------------
+    def _append_spool(self, payload):
+        with self._spool_lock, open(self.spool_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_spool(self):
+        with self._spool_lock:
+            return self._read_spool_unlocked()
+
+    def _read_spool_unlocked(self):
+        entries = []
+        try:
+            with open(self.spool_path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # A torn last line from a crash mid-write; drop it
+                        print("Skipping corrupt spool line")
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _remove_from_spool(self, sent):
+        """Drop the sent entries; results appended meanwhile are kept"""
+        ids = {payload.get("submission_id") for payload in sent}
+        with self._spool_lock:
+            remaining = [p for p in self._read_spool_unlocked() if p.get("submission_id") not in ids]
+            self._rewrite_spool(remaining)
+
+    def _rewrite_spool(self, entries):
+        tmp = self.spool_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for payload in entries:
+                f.write(json.dumps(payload) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.spool_path)
+
+    # -----------------------------------------------------------------
+    # Worker
+    # -----------------------------------------------------------------
+    def _drain(self):
+        """Send spooled results in batches; returns how many the server
+        rejected (dropped from the spool), or None on failure"""
+        entries = self._read_spool()
+        size = BATCH_SIZE
+        rejected = 0
+        while entries:
+            batch = entries[:size]
+            try:
+                resp = self._session.post(self._url("submit_results"),
+                                          json={"results": batch}, timeout=self.timeout)
+                if resp.status_code == 400 and len(batch) > 1:
+                    # Server that rejects whole batches: find the bad result one by one
+                    size = 1
+                    continue
+                if resp.status_code == 400:
+                    # The server will never accept it; don't let it block the spool
+                    print("Server rejected spooled result:", resp.text)
+                    rejected += 1
+                else:
+                    resp.raise_for_status()
+                    for item in resp.json().get("rejected", []):
+                        print("Server rejected spooled result:", item)
+                        rejected += 1
+            except Exception as e:
+                print("Score submission failed:", e)
+                return None
+            self._remove_from_spool(batch)
+            entries = self._read_spool()
+        return rejected
+
+    def _ping(self):
+        try:
+            # A cold start can take much longer than a normal request
+            self._session.get(f"{self.base_url}/health", timeout=WARMUP_TIMEOUT_S)
+            return True
+        except Exception as e:
+            print("Leaderboard warm-up failed:", e)
+            return False
+
+    def _run(self):
+        # requests is slow to import; doing it here keeps it off game startup
+        import requests
+        self._session = requests.Session()
+
+        # Results left over from a previous session are retried straight away
+        has_pending = bool(self._read_spool())
+        while True:
+            wait = max(0.0, self._next_attempt - time.monotonic()) if has_pending else None
+            try:
+                item = self._queue.get(timeout=wait)
+                if item is _WARM_UP:
+                    # The server is reachable again: retry the spool now
+                    if self._ping():
+                        self._next_attempt = 0.0
+                else:
+                    # A fresh result gets an attempt straight away (after
+                    # batch_delay) even while backing off
+                    due = time.monotonic() + self.batch_delay
+                    if not has_pending or due < self._next_attempt:
+                        self._next_attempt = due
+                    has_pending = True
+                self._queue.task_done()
+                continue
+            except queue.Empty:
+                pass
+
+            rejected = self._drain()
+            if rejected is not None:
+                has_pending = False
+                self._backoff = 0.0
+                new_status = STATUS_REJECTED if rejected else STATUS_SAVED
+            else:
+                self._backoff = min(BACKOFF_MAX_S, max(BACKOFF_MIN_S, self._backoff * 2))
+                self._next_attempt = time.monotonic() + self._backoff * random.uniform(0.8, 1.2)
+                new_status = STATUS_OFFLINE
+            # Replaying an old spool in the background shouldn't touch the UI
+            if self.status != STATUS_IDLE:
+                self.status = new_status
@@ -0,0 +1,212 @@
+"""Streaming score statistics for the WASK leaderboard.
+
+Summaries are updated once per submitted score so the stats panel and the
+/stats endpoint never have to walk the full scores table.
+"""
+import bisect
+import math
+import threading
+
+# Fixed histogram buckets (upper edges, seconds). The last bucket is open.
+HISTOGRAM_EDGES = [10, 20, 30, 45, 60, 90, 120, 180, 300, 600]
+
+
+class TDigest:
+    """Small merging t-digest for approximate quantiles.
+
+    Centroids are kept sorted by mean. New values are buffered and folded in
+    when the buffer fills, so adding a value is amortised O(1) and the digest
+    never holds more than roughly `compression` centroids.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.total = 0
+        self._buffer = []
+        self._buffer_limit = compression * 5
+
+    def add(self, value, weight=1):
+        value = float(value)
+        if not math.isfinite(value):
+            # One NaN or inf would poison every quantile from then on
+            raise ValueError(f"cannot add non-finite value {value}")
+        self._buffer.append((value, weight))
+        self.total += weight
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other):
+        """Fold another digest into this one"""
+        other._compress()
+        for mean, weight in zip(other.means, other.weights):
+            self._buffer.append((mean, weight))
+            self.total += weight
+        self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+
+        means = []
+        weights = []
+        total = self.total
+        seen = 0
+        cur_mean, cur_weight = points[0]
+        # k1 scale function: centroids are small near the tails and large in
+        # the middle, which keeps p1/p99 accurate.
+        k_limit = self._k(0) + 1
+        for mean, weight in points[1:]:
+            q = (seen + cur_weight + weight) / total
+            if self._k(q) <= k_limit:
+                cur_mean += (mean - cur_mean) * weight / (cur_weight + weight)
+                cur_weight += weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                seen += cur_weight
+                k_limit = self._k(seen / total) + 1
+                cur_mean, cur_weight = mean, weight
+        means.append(cur_mean)
+        weights.append(cur_weight)
+
+        self.means = means
+        self.weights = weights
+
+    def _k(self, q):
+        q = min(max(q, 0.0), 1.0)
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def quantile(self, q):
+        """Approximate value at quantile q (0..1), or None when empty"""
+        self._compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+
+        target = q * self.total
+        cumulative = 0
+        for i, weight in enumerate(self.weights):
+            mid = cumulative + weight / 2
+            if target <= mid:
+                if i == 0:
+                    return self.means[0]
+                prev_mid = cumulative - self.weights[i - 1] / 2
+                frac = (target - prev_mid) / (mid - prev_mid)
+                return self.means[i - 1] + frac * (self.means[i] - self.means[i - 1])
+            cumulative += weight
+        return self.means[-1]
+
+
+class ScoreSummary:
+    """Count, mean, min/max, quantile sketch and histogram for one series"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.best = None
+        self.worst = None
+        self.digest = TDigest()
+        self.buckets = [0] * (len(HISTOGRAM_EDGES) + 1)
+
+    def add(self, time_s):
+        time_s = float(time_s)
+        if not math.isfinite(time_s):
+            # Would make the mean NaN/inf, which jsonify emits as invalid JSON
+            raise ValueError(f"cannot add non-finite time {time_s}")
+        self.count += 1
+        self.total += time_s
+        self.best = time_s if self.best is None else min(self.best, time_s)
+        self.worst = time_s if self.worst is None else max(self.worst, time_s)
+        self.digest.add(time_s)
+        self.buckets[bisect.bisect_right(HISTOGRAM_EDGES, time_s)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        for value in (other.best, other.worst):
+            if value is not None:
+                self.best = value if self.best is None else min(self.best, value)
+                self.worst = value if self.worst is None else max(self.worst, value)
+        self.digest.merge(other.digest)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def to_dict(self):
+        labels = []
+        low = 0
+        for edge in HISTOGRAM_EDGES:
+            labels.append(f"{low}-{edge}")
+            low = edge
+        labels.append(f"{low}+")
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "best": self.best,
+            "worst": self.worst,
+            "p50": self.digest.quantile(0.5),
+            "p90": self.digest.quantile(0.9),
+            "p99": self.digest.quantile(0.99),
+            "histogram": [
+                {"range": label, "count": n} for label, n in zip(labels, self.buckets)
+            ],
+        }
+
+
+class ScoreStats:
+    """Thread-safe ScoreSummary registry keyed by (score_type, outcome)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def add(self, score_type, outcome, time_s):
+        with self._lock:
+            key = (score_type, outcome)
+            if key not in self._series:
+                self._series[key] = ScoreSummary()
+            self._series[key].add(time_s)
+
+    def load(self, rows):
+        """Seed from (score_type, outcome, time_s) rows, e.g. at startup.
+
+        Rows with a missing or non-finite time are skipped; returns how many.
+        """
+        fresh = {}
+        skipped = 0
+        for score_type, outcome, time_s in rows:
+            key = (score_type, outcome)
+            summary = fresh.get(key) or ScoreSummary()
+            try:
+                summary.add(time_s)
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            fresh[key] = summary
+        with self._lock:
+            self._series = fresh
+        return skipped
+
+    def summary(self, score_type, outcome=None):
+        """Summary for one outcome, or all outcomes of a type merged"""
+        with self._lock:
+            merged = ScoreSummary()
+            for (stype, out), series in self._series.items():
+                if stype == score_type and outcome in (None, out):
+                    merged.merge(series)
+            return merged
+
+    def to_dict(self):
+        with self._lock:
+            keys = sorted(self._series)
+        data = {}
+        for score_type, outcome in keys:
+            entry = data.setdefault(score_type, {"all": None, "outcomes": {}})
+            entry["outcomes"][outcome] = self.summary(score_type, outcome).to_dict()
+        for score_type, entry in data.items():
+            entry["all"] = self.summary(score_type).to_dict()
+        return data
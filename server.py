@@ -1,9 +1,19 @@
 from flask import Flask, request, jsonify, render_template_string
 from datetime import datetime
+from collections import OrderedDict
+import base64
+import binascii
+import math
 import sqlite3
 import os
+import re
+import threading
 import traceback
 
+from replay_verifier import (MAX_REPLAY_BYTES, PENDING, REJECTED, VERIFIED, ReplayVerifier,
+                             replay_fingerprint)
+from score_stats import ScoreStats, ScoreSummary
+
 app = Flask(__name__)
 
 # Database configuration for Render.com
@@ -12,10 +22,21 @@ if os.environ.get('RENDER'):
     print("⚡ RENDER ENVIRONMENT DETECTED")
     print(f"⚡ Database: {DB_PATH}")
 else:
-    DB_PATH = "leaderboard.db"
+    # LEADERBOARD_DB lets a second instance (e.g. aggregator.py) keep its own file
+    DB_PATH = os.environ.get("LEADERBOARD_DB") or "leaderboard.db"
     print(f"💻 LOCAL DEVELOPMENT")
     print(f"💻 Database: {DB_PATH}")
 
+# Leaderboards ("boards") partition scores by class, event or game version.
+# The original single board is "main" and keeps the old un-prefixed routes.
+DEFAULT_BOARD = "main"
+BOARD_RE = re.compile(r"^[A-Za-z0-9_-]{1,40}$")
+MAX_CACHED_BOARDS = 500
+
+def valid_board(board):
+    """Board keys are short slugs so they are safe in URLs and SQL params"""
+    return bool(board) and bool(BOARD_RE.match(board))
+
 def init_db():
     """Initialize database - guaranteed to create table"""
     try:
@@ -31,9 +52,49 @@ def init_db():
                 time_s REAL NOT NULL,
                 outcome TEXT NOT NULL,
                 score_type TEXT DEFAULT 'game',  -- 'game' or 'test'
-                timestamp TEXT NOT NULL
+                timestamp TEXT NOT NULL,
+                board TEXT NOT NULL DEFAULT 'main',
+                submission_id TEXT,  -- client-generated, makes retries idempotent
+                verification TEXT    -- NULL (no replay), 'pending', 'verified' or 'rejected'
+            )
+        """)
+
+        # Replays sent with scores, kept for verification and later review
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS replays (
+                score_id INTEGER PRIMARY KEY,
+                data BLOB NOT NULL,
+                detail TEXT,
+                sha256 TEXT  -- Replay.fingerprint(): a run backs one score only
             )
         """)
+
+        # Older databases were created without the newer columns
+        c.execute("PRAGMA table_info(scores)")
+        columns = [row[1] for row in c.fetchall()]
+        if 'board' not in columns:
+            c.execute("ALTER TABLE scores ADD COLUMN board TEXT NOT NULL DEFAULT 'main'")
+        if 'submission_id' not in columns:
+            c.execute("ALTER TABLE scores ADD COLUMN submission_id TEXT")
+        if 'verification' not in columns:
+            c.execute("ALTER TABLE scores ADD COLUMN verification TEXT")
+        c.execute("PRAGMA table_info(replays)")
+        if 'sha256' not in [row[1] for row in c.fetchall()]:
+            c.execute("ALTER TABLE replays ADD COLUMN sha256 TEXT")
+
+        # Per-board ranking index: every leaderboard query is one range scan
+        c.execute("""
+            CREATE INDEX IF NOT EXISTS idx_scores_board_type_time
+            ON scores (board, score_type, time_s)
+        """)
+        c.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_scores_submission
+            ON scores (submission_id) WHERE submission_id IS NOT NULL
+        """)
+        c.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_replays_sha256
+            ON replays (sha256) WHERE sha256 IS NOT NULL
+        """)
         
         conn.commit()
         conn.close()
@@ -54,56 +115,252 @@ def init_db():
         print(traceback.format_exc())
         return False
 
-def add_score(name, email, time_s, outcome, score_type='game'):
-    """Add a score to the database"""
+# Streaming summaries per board and (score_type, outcome), updated as scores arrive
+board_stats = {}
+board_stats_lock = threading.Lock()
+
+def get_board_stats(board):
+    """ScoreStats for one board, created when it gets its first score"""
+    with board_stats_lock:
+        if board not in board_stats:
+            board_stats[board] = ScoreStats()
+        return board_stats[board]
+
+def read_board_stats(board):
+    """ScoreStats to display; a board with no scores gets an empty one that
+    isn't kept, so requests for made-up board names don't use up memory"""
+    with board_stats_lock:
+        stats = board_stats.get(board)
+    return stats if stats is not None else ScoreStats()
+
+def load_stats():
+    """Seed the streaming stats from the database (once, at startup)"""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        c.execute("SELECT board, score_type, outcome, time_s FROM scores ORDER BY board")
+        rows_by_board = {}
+        for board, score_type, outcome, time_s in c.fetchall():
+            rows_by_board.setdefault(board, []).append((score_type, outcome, time_s))
+        conn.close()
+        for board, rows in rows_by_board.items():
+            skipped = get_board_stats(board).load(rows)
+            if skipped:
+                print(f"⚠️ Skipped {skipped} scores with unusable times on board {board}")
+        print(f"✅ Stats loaded for boards: {sorted(rows_by_board)}")
+        return True
+    except Exception as e:
+        print(f"❌ Error loading stats: {e}")
+        print(traceback.format_exc())
+        return False
+
+# Per-board cache of ranked rows, invalidated when that board gets a new score.
+# Least recently used boards are dropped so hundreds of boards stay bounded.
+score_cache = OrderedDict()
+score_cache_versions = {}
+score_cache_lock = threading.Lock()
+
+def invalidate_board_cache(board):
+    with score_cache_lock:
+        score_cache.pop(board, None)
+        score_cache_versions[board] = score_cache_versions.get(board, 0) + 1
+
+# Replays are re-simulated in worker processes (VERIFY_WORKERS of them, or
+# up to two by default); a finished check updates the row and the cache
+verifier = ReplayVerifier(DB_PATH, workers=int(os.environ.get("VERIFY_WORKERS", 0)) or None,
+                          on_update=lambda score_id, board, status: invalidate_board_cache(board))
+
+def parse_time(value):
+    """Submitted time_s -> float; ValueError unless a positive finite number"""
+    if isinstance(value, bool):
+        raise ValueError("time_s must be a number")
+    try:
+        time_s = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("time_s must be a number") from None
+    if not math.isfinite(time_s) or time_s <= 0:
+        raise ValueError("time_s must be a positive number of seconds")
+    return time_s
+
+# Clients send a uuid4 hex; anything else that isn't a short string is refused
+MAX_SUBMISSION_ID_LENGTH = 64
+
+def parse_submission_id(value):
+    """Submitted submission_id -> str or None; ValueError if unusable"""
+    if value is None:
+        return None
+    if not isinstance(value, str) or not 0 < len(value) <= MAX_SUBMISSION_ID_LENGTH:
+        raise ValueError(f"submission_id must be a string of 1-{MAX_SUBMISSION_ID_LENGTH} characters")
+    return value
+
+def decode_replay(value):
+    """Base64 replay from a submission -> bytes, or None if missing/unusable"""
+    if not value:
+        return None
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, TypeError, ValueError):
+        print("⚠️ Ignoring replay that is not valid base64")
+        return None
+    if len(data) > MAX_REPLAY_BYTES:
+        print(f"⚠️ Ignoring {len(data)} byte replay (limit {MAX_REPLAY_BYTES})")
+        return None
+    return data
+
+def add_score(name, email, time_s, outcome, score_type='game', board=DEFAULT_BOARD,
+              submission_id=None, replay=None):
+    """Add a score to the database; -> (added, verification) as for
+    add_scores, or None on error"""
+    entry = {
+        'name': name,
+        'email': email,
+        'time_s': time_s,
+        'outcome': outcome,
+        'score_type': score_type,
+        'submission_id': submission_id,
+        'replay': replay,
+    }
+    stored = add_scores([entry], board)
+    return stored[0] if stored is not None else None
+
+# Callables run as fn(board, entries) with every batch of newly stored scores
+# (aggregator.py uses this to forward results upstream)
+score_listeners = []
+
+def add_scores(entries, board=DEFAULT_BOARD):
+    """Add several scores in one transaction.
+
+    Entries whose submission_id is already stored are skipped, so clients can
+    safely retry; any other failed insert fails the whole batch. Returns one
+    (added, verification) pair per entry, giving the verification status
+    stored for it (the earlier row's for a skipped duplicate), or None on
+    error.
+    """
     try:
         conn = sqlite3.connect(DB_PATH)
         c = conn.cursor()
         timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-        
-        # Ensure time_s is float
-        try:
-            time_s_float = float(time_s)
-        except:
-            time_s_float = 0.0
-        
-        c.execute("""
-            INSERT INTO scores (name, email, time_s, outcome, score_type, timestamp) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (name, email, time_s_float, outcome, score_type, timestamp))
-        
+
+        added = []
+        stored = []
+        for entry in entries:
+            # Callers validate; a bad time here is a bug, so fail the transaction
+            time_s_float = parse_time(entry['time_s'])
+
+            replay = entry.get('replay')
+            verification = reused = invalid = None
+            if replay:
+                # A replay that already backs another score proves nothing about
+                # this one; the digest is of the run, so repacking doesn't hide it
+                try:
+                    digest = replay_fingerprint(replay)
+                except ValueError as e:
+                    invalid = str(e)
+                    verification = REJECTED
+                else:
+                    c.execute("SELECT score_id FROM replays WHERE sha256 = ?", (digest,))
+                    reused = c.fetchone()
+                    verification = REJECTED if reused else PENDING
+            c.execute("""
+                INSERT INTO scores
+                    (name, email, time_s, outcome, score_type, timestamp, board, submission_id,
+                     verification)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (submission_id) WHERE submission_id IS NOT NULL DO NOTHING
+            """, (entry['name'], entry['email'], time_s_float, entry['outcome'],
+                  entry['score_type'], timestamp, board, entry.get('submission_id'),
+                  verification))
+            if c.rowcount:
+                score_id = c.lastrowid
+                if verification == PENDING:
+                    c.execute("INSERT INTO replays (score_id, data, sha256) VALUES (?, ?, ?)",
+                              (score_id, sqlite3.Binary(replay), digest))
+                elif reused:
+                    print(f"🚫 Score {score_id} reuses the replay of score {reused[0]}")
+                elif invalid:
+                    print(f"🚫 Score {score_id} has an unreadable replay: {invalid}")
+                added.append((entry, time_s_float, score_id, verification))
+                stored.append((True, verification))
+            else:
+                c.execute("SELECT verification FROM scores WHERE submission_id = ?",
+                          (entry['submission_id'],))
+                stored.append((False, c.fetchone()[0]))
+
         conn.commit()
         conn.close()
-        print(f"✅ Score added: {name} - {time_s_float}s - {score_type}")
-        return True
+
+        if added:
+            invalidate_board_cache(board)
+        stats = get_board_stats(board)
+        for entry, time_s_float, score_id, verification in added:
+            stats.add(entry['score_type'], entry['outcome'], time_s_float)
+            print(f"✅ Score added: {entry['name']} - {time_s_float}s - {entry['score_type']} - {board}")
+            if verification == PENDING:
+                verifier.submit(score_id, board, entry['replay'], time_s_float, entry['outcome'])
+        if added:
+            for listener in score_listeners:
+                try:
+                    listener(board, [entry for entry, _, _, _ in added])
+                except Exception as e:
+                    print(f"❌ Score listener failed: {e}")
+        return stored
     except Exception as e:
         print(f"❌ Error adding score: {e}")
         print(traceback.format_exc())
-        return False
+        return None
 
-def get_scores_by_type(score_type):
-    """Get scores by type ('game' or 'test')"""
+def get_scores_by_type(score_type, board=DEFAULT_BOARD, verified_only=False):
+    """Get scores by type ('game' or 'test') for one board.
+
+    Game rows are (name, time_s, outcome, timestamp, verification);
+    verified_only keeps just the runs whose replay checked out.
+    """
+    key = (score_type, verified_only)
     try:
+        with score_cache_lock:
+            cached = score_cache.get(board)
+            if cached is not None and key in cached:
+                score_cache.move_to_end(board)
+                return cached[key]
+            version = score_cache_versions.get(board, 0)
+
         conn = sqlite3.connect(DB_PATH)
         c = conn.cursor()
         
-        if score_type == 'game':
+        if score_type == 'game' and verified_only:
+            c.execute("""
+                SELECT name, time_s, outcome, timestamp, verification
+                FROM scores 
+                WHERE board = ? AND score_type = 'game' AND verification = ?
+                ORDER BY time_s ASC
+            """, (board, VERIFIED))
+        elif score_type == 'game':
             c.execute("""
-                SELECT name, time_s, outcome, timestamp 
+                SELECT name, time_s, outcome, timestamp, verification
                 FROM scores 
-                WHERE score_type = 'game' 
+                WHERE board = ? AND score_type = 'game' 
                 ORDER BY time_s ASC
-            """)
+            """, (board,))
         else:
             c.execute("""
                 SELECT name, time_s, timestamp 
                 FROM scores 
-                WHERE score_type = 'test' 
+                WHERE board = ? AND score_type = 'test' 
                 ORDER BY time_s ASC
-            """)
+            """, (board,))
         
         rows = c.fetchall()
         conn.close()
+
+        with score_cache_lock:
+            # Skip caching if a score landed on this board while we queried,
+            # or if it has none (any made-up board name would be empty)
+            if not rows or score_cache_versions.get(board, 0) != version:
+                return rows
+            score_cache.setdefault(board, {})[key] = rows
+            score_cache.move_to_end(board)
+            while len(score_cache) > MAX_CACHED_BOARDS:
+                score_cache.popitem(last=False)
         return rows
     except Exception as e:
         print(f"❌ Error getting scores: {e}")
@@ -111,15 +368,19 @@ def get_scores_by_type(score_type):
         return []
 
 @app.route("/")
-def index():
+@app.route("/b/<board>/")
+def index(board=DEFAULT_BOARD):
     """Main page with game and test scores - SIMPLIFIED VERSION"""
+    if not valid_board(board):
+        return "Unknown board", 404
     try:
         # Initialize database if needed
         init_db()
         
-        # Get scores
-        game_scores = get_scores_by_type('game')
-        test_scores = get_scores_by_type('test')
+        # Get scores (?verified=1 hides runs without a verified replay)
+        verified_only = request.args.get('verified') == '1'
+        game_scores = get_scores_by_type('game', board, verified_only)
+        test_scores = get_scores_by_type('test', board)
         
         # Create indexed lists WITHOUT enumerate
         indexed_game_scores = []
@@ -131,7 +392,8 @@ def index():
                     'name': row[0],
                     'time': time_float,
                     'outcome': row[2],
-                    'timestamp': row[3]
+                    'timestamp': row[3],
+                    'verification': row[4]
                 })
             except:
                 indexed_game_scores.append({
@@ -139,7 +401,8 @@ def index():
                     'name': row[0],
                     'time': 0.0,
                     'outcome': row[2],
-                    'timestamp': row[3]
+                    'timestamp': row[3],
+                    'verification': row[4]
                 })
         
         indexed_test_scores = []
@@ -160,18 +423,37 @@ def index():
                     'timestamp': row[2]
                 })
         
-        # Calculate best time safely
-        if indexed_game_scores:
-            best_time = f"{indexed_game_scores[0]['time']:.2f}"
+        # Stats panel values come from the streaming summaries, except for
+        # the verified view, which summarises the (cached) rows it shows
+        stats = read_board_stats(board)
+        if verified_only:
+            verified = ScoreSummary()
+            for row in game_scores:
+                verified.add(row[1])
+            game_stats = verified.to_dict()
+        else:
+            game_stats = stats.summary('game').to_dict()
+        test_stats = stats.summary('test').to_dict()
+
+        def fmt_time(value):
+            return f"{value:.2f}" if value is not None else "0.00"
+
+        best_time = fmt_time(game_stats['best'])
+        median_time = fmt_time(game_stats['p50'])
+        p90_time = fmt_time(game_stats['p90'])
+
+        if verified_only:
+            filter_link = '<a class="filter" href="?">Show all runs</a>'
         else:
-            best_time = "0.00"
+            filter_link = '<a class="filter" href="?verified=1">Verified runs only</a>'
+        verification_marks = {VERIFIED: "✅", PENDING: "⏳", REJECTED: "🚫"}
         
         # SIMPLE HTML TEMPLATE WITHOUT COMPLEX JINJA2 FORMATTING
         html = f"""
         <!DOCTYPE html>
         <html>
         <head>
-            <title>WASK Leaderboard</title>
+            <title>WASK Leaderboard - {board}</title>
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <style>
@@ -309,6 +591,12 @@ def index():
                     font-size: 0.9em;
                 }}
                 
+                .filter {{
+                    float: right;
+                    font-size: 0.6em;
+                    color: #4CAF50;
+                }}
+                
                 footer {{
                     text-align: center;
                     margin-top: 30px;
@@ -319,11 +607,11 @@ def index():
         </head>
         <body>
             <div class="container">
-                <h1>🏆 WASK Leaderboard</h1>
+                <h1>🏆 WASK Leaderboard{'' if board == DEFAULT_BOARD else f' - {board}'}</h1>
                 
                 <!-- Game Scores -->
                 <div class="section">
-                    <div class="section-title">🎮 Game Scores ({len(indexed_game_scores)} players)</div>
+                    <div class="section-title">🎮 Game Scores ({len(indexed_game_scores)} players){filter_link}</div>
         """
         
         if indexed_game_scores:
@@ -334,6 +622,7 @@ def index():
                             <th>Player</th>
                             <th>Time (s)</th>
                             <th>Result</th>
+                            <th>Replay</th>
                             <th>Submitted</th>
                         </tr>
             """
@@ -357,6 +646,7 @@ def index():
                             <td>{score['name']}</td>
                             <td class="time-cell">{score['time']:.2f}</td>
                             <td>{score['outcome']}</td>
+                            <td title="{score['verification'] or 'no replay'}">{verification_marks.get(score['verification'], '')}</td>
                             <td>{score['timestamp']}</td>
                         </tr>
                 """
@@ -365,8 +655,8 @@ def index():
                     </table>
             """
         else:
-            html += """
-                    <div class="empty">No game scores yet. Be the first to play!</div>
+            html += f"""
+                    <div class="empty">{'No verified runs yet.' if verified_only else 'No game scores yet. Be the first to play!'}</div>
             """
         
         html += f"""
@@ -412,21 +702,29 @@ def index():
                 <!-- Stats -->
                 <div class="stats">
                     <div class="stat">
-                        <div class="stat-value">{len(indexed_game_scores)}</div>
+                        <div class="stat-value">{game_stats['count']}</div>
                         <div class="stat-label">Game Players</div>
                     </div>
                     <div class="stat">
-                        <div class="stat-value">{len(indexed_test_scores)}</div>
+                        <div class="stat-value">{test_stats['count']}</div>
                         <div class="stat-label">Test Scores</div>
                     </div>
                     <div class="stat">
                         <div class="stat-value">{best_time}</div>
                         <div class="stat-label">Best Time</div>
                     </div>
+                    <div class="stat">
+                        <div class="stat-value">{median_time}</div>
+                        <div class="stat-label">Median Time</div>
+                    </div>
+                    <div class="stat">
+                        <div class="stat-value">{p90_time}</div>
+                        <div class="stat-label">90th Percentile</div>
+                    </div>
                 </div>
                 
                 <footer>
-                    <p>Running on Render.com | Database: {DB_PATH}</p>
+                    <p>Running on Render.com | Board: {board} | Database: {DB_PATH}</p>
                 </footer>
             </div>
         </body>
@@ -452,17 +750,22 @@ def index():
         """, 500
 
 @app.route("/leaderboard")
-def api_leaderboard():
-    """API endpoint for game scores"""
+@app.route("/b/<board>/leaderboard")
+def api_leaderboard(board=DEFAULT_BOARD):
+    """API endpoint for game scores (?verified=1 for verified runs only)"""
+    if not valid_board(board):
+        return jsonify({"error": "Invalid board"}), 404
     try:
-        scores = get_scores_by_type('game')
+        verified_only = request.args.get('verified') == '1'
+        scores = get_scores_by_type('game', board, verified_only)
         data = [
             {
                 "rank": i+1,
                 "name": row[0],
                 "time_s": float(row[1]),
                 "outcome": row[2],
-                "timestamp": row[3]
+                "timestamp": row[3],
+                "verification": row[4]
             }
             for i, row in enumerate(scores)
         ]
@@ -471,9 +774,38 @@ def api_leaderboard():
         print(f"❌ API error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/stats")
+@app.route("/b/<board>/stats")
+def api_stats(board=DEFAULT_BOARD):
+    """API endpoint for streaming score statistics"""
+    if not valid_board(board):
+        return jsonify({"error": "Invalid board"}), 404
+    try:
+        return jsonify(read_board_stats(board).to_dict())
+    except Exception as e:
+        print(f"❌ Stats error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/boards")
+def api_boards():
+    """API endpoint listing boards and their score counts"""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        c.execute("SELECT board, COUNT(*) FROM scores GROUP BY board ORDER BY board")
+        rows = c.fetchall()
+        conn.close()
+        return jsonify([{"board": row[0], "score_count": row[1]} for row in rows])
+    except Exception as e:
+        print(f"❌ Boards error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/submit_result", methods=["POST"])
-def submit_result():
+@app.route("/b/<board>/submit_result", methods=["POST"])
+def submit_result(board=DEFAULT_BOARD):
     """Endpoint for game scores"""
+    if not valid_board(board):
+        return jsonify({"error": "Invalid board"}), 404
     try:
         data = request.get_json()
         if not data:
@@ -481,19 +813,27 @@ def submit_result():
             
         name = data.get('name', 'Player').strip()
         email = data.get('email', '').strip()
-        time_s = data.get('time_s', 0.0)
         outcome = data.get('outcome', 'unknown').strip()
+        try:
+            submission_id = parse_submission_id(data.get('submission_id'))
+            time_s = parse_time(data.get('time_s'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        replay = decode_replay(data.get('replay'))
         
-        success = add_score(name, email, time_s, outcome, 'game')
+        stored = add_score(name, email, time_s, outcome, 'game', board, submission_id, replay)
         
-        if success:
+        if stored is not None:
+            added, verification = stored
             return jsonify({
                 "status": "success",
-                "message": "Game score added",
+                "message": "Game score added" if added else "Game score already stored",
                 "data": {
                     "name": name,
                     "time_s": time_s,
-                    "outcome": outcome
+                    "outcome": outcome,
+                    "board": board,
+                    "verification": verification
                 }
             })
         else:
@@ -503,6 +843,58 @@ def submit_result():
         print(f"❌ Submit result error: {e}")
         return jsonify({"error": str(e)}), 400
 
+@app.route("/submit_results", methods=["POST"])
+@app.route("/b/<board>/submit_results", methods=["POST"])
+def submit_results(board=DEFAULT_BOARD):
+    """Endpoint for batches of game scores (offline spool replay)"""
+    if not valid_board(board):
+        return jsonify({"error": "Invalid board"}), 404
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('results'), list):
+            return jsonify({"error": "No results"}), 400
+
+        # One bad result must not sink the rest of a spooled batch: invalid
+        # items are reported back by index and the others are stored
+        entries = []
+        rejected = []
+        for index, item in enumerate(data['results']):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("result must be an object")
+                time_s = parse_time(item.get('time_s'))
+                submission_id = parse_submission_id(item.get('submission_id'))
+            except ValueError as e:
+                rejected.append({"index": index, "error": str(e)})
+                continue
+            entries.append({
+                'name': str(item.get('name', 'Player')).strip(),
+                'email': str(item.get('email', '')).strip(),
+                'time_s': time_s,
+                'outcome': str(item.get('outcome', 'unknown')).strip(),
+                'score_type': 'game',
+                'submission_id': submission_id,
+                'replay': decode_replay(item.get('replay')),
+            })
+        if rejected:
+            print(f"⚠️ Rejected {len(rejected)} of {len(data['results'])} results: {rejected}")
+
+        stored = add_scores(entries, board) if entries else []
+        if stored is None:
+            return jsonify({"error": "Failed to add scores"}), 500
+        added = sum(1 for new, _ in stored if new)
+        return jsonify({
+            "status": "success",
+            "received": len(data['results']),
+            "added": added,
+            "rejected": rejected,
+            "board": board
+        })
+
+    except Exception as e:
+        print(f"❌ Submit results error: {e}")
+        return jsonify({"error": str(e)}), 400
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
@@ -529,24 +921,35 @@ def health_check():
             "database": "connected",
             "tables": [t[0] for t in tables],
             "score_count": count,
-            "path": DB_PATH
+            "path": DB_PATH,
+            "replay_verifier": {
+                "available": verifier.available,
+                "workers": verifier.workers,
+                "completed": verifier.completed
+            }
         })
     except Exception as e:
         print(f"❌ Health check error: {e}")
         return jsonify({"status": "unhealthy", "error": str(e)}), 500
 
 @app.route('/submit', methods=['POST'])
-def submit():
+@app.route('/b/<board>/submit', methods=['POST'])
+def submit(board=DEFAULT_BOARD):
     """Endpoint for test scores"""
+    if not valid_board(board):
+        return jsonify({"error": "Invalid board"}), 404
     try:
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data"}), 400
             
         name = data.get('name', 'TestPlayer').strip()
-        time_s = data.get('time_s', 0.0)
+        try:
+            time_s = parse_time(data.get('time_s'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        success = add_score(name, '', time_s, 'test', 'test')
+        success = add_score(name, '', time_s, 'test', 'test', board)
         
         if success:
             return jsonify({
@@ -569,6 +972,13 @@ print("=" * 60)
 # Initialize database
 if init_db():
     print("✅ Database initialized successfully")
+    load_stats()
+    if verifier.available:
+        requeued = verifier.requeue_pending()
+        if requeued:
+            print(f"🔁 Re-queued {requeued} pending replays for verification")
+    else:
+        print("⚠️ Replay verification unavailable (needs pygame and numpy)")
 else:
     print("⚠️ Database had issues, will retry on first request")
 
@@ -0,0 +1,516 @@
+"""Game simulation for Cyber_game.py, independent of the window.
+
+GameState holds everything a run needs (player, level, enemies, boss,
+shockwaves, questions and the run clock) and advances it one fixed 1/60 s
+tick per step(inputs). Nothing here draws, plays sound or talks to the
+network. Things the front end has to react to are queued on
+GameState.events instead:
+
+    ("level", idx)                  a level was (re)loaded
+    ("question", kind)              a question opened ("tf" or "portal")
+    ("answered", correct)           the player answered it
+    ("finished", outcome, time_s)   the run ended ("win" or "lose")
+
+Only pygame.Rect is used from pygame, so no display is needed; see
+headless.py for running it without a window.
+"""
+import random
+
+import numpy as np
+import pygame
+
+from entity_store import EntityPool, EntityStore
+from level_data import DEFAULT_CACHE_DIR, LevelSet
+from spatial_hash import SpatialHash
+
+TICK_HZ = 60
+BASE_W, BASE_H = 800, 500
+
+# Sizes and speeds in base (800x500) units; GameState scales them
+GROUND_H = 40
+WALL_W = 12
+PLAYER_W, PLAYER_H = 40, 50
+MOVE_SPEED = 5
+GRAVITY = 0.6
+JUMP_FORCE = -16
+MAX_FALL_SPEED = 14
+ENEMY_SPEED = 2
+GRID_CELL = 80
+
+# Shooting
+ATTACK_COOLDOWN = 1000  # ms
+ATTACK_RANGE = 220
+BULLET_SPEED = 10
+BULLET_SIZE = (10, 5)
+MAX_PROJECTILES = 5
+
+# Boss and its shockwaves
+BOSS_SIZE = 100
+BOSS_MARGIN = 120
+BOSS_FALL_SPEED = 16
+SHOCKWAVE_SPEED = 10
+SHOCKWAVE_H = 14
+SHOCKWAVE_LIFE = 35   # ticks
+
+START_LIVES = 3
+MAX_LIVES = 5
+
+NO_INPUT = {"left": False, "right": False, "jump": False, "attack": False}
+
+# Questions
+TF_QUESTIONS = [
+    ("Your cell phone cannot be infected by malware.", False),
+    ("Two-factor authentication improves security.", True),
+    ("Using the same password everywhere is safe.", False),
+]
+
+MC_QUESTIONS = [
+    ("Which is the BEST way to verify a suspicious email?",
+     ["Click the link", "Reply to sender", "Verify via official channel"], 2),
+    ("What does phishing try to do?",
+     ["Steal your information", "Improve battery life", "Clean malware"], 0),
+]
+
+
+class GameState:
+    def __init__(self, size=(BASE_W, BASE_H), levels=None, seed=None, level_cache=True):
+        self.width, self.height = size
+        self.Sx = self.width / BASE_W
+        self.Sy = self.height / BASE_H
+        self.S = min(self.Sx, self.Sy)
+        ss = self.ss
+
+        if levels is None:
+            # level_cache=False: scale levels in memory only, write no cache files
+            levels = LevelSet(size, (self.Sx, self.Sy, self.S),
+                              cache_dir=DEFAULT_CACHE_DIR if level_cache else None)
+        self.levels = levels
+        # Question picks are the only randomness; replays store the seed
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.events = []
+
+        self.ground_y = self.height - ss(GROUND_H)
+        self.left_wall = pygame.Rect(0, 0, ss(WALL_W), self.ground_y)
+        self.right_wall = pygame.Rect(self.width - ss(WALL_W), 0, ss(WALL_W), self.ground_y)
+        self.move_speed = ss(MOVE_SPEED)
+        self.gravity = GRAVITY * self.S
+        self.jump_force = JUMP_FORCE * self.S
+        self.max_fall_speed = MAX_FALL_SPEED * self.S
+        self.enemy_speed = ss(ENEMY_SPEED)
+        self.attack_range = ss(ATTACK_RANGE)
+        self.bullet_speed = ss(BULLET_SPEED)
+        self.bullet_size = (ss(BULLET_SIZE[0]), ss(BULLET_SIZE[1]))
+
+        # Player
+        self.player = pygame.Rect(self.sx(60), self.sy(BASE_H - 100), ss(PLAYER_W), ss(PLAYER_H))
+        self.player_vel_y = 0.0
+        self.player_on_ground = False
+        self.can_double_jump = True
+        self.facing = 1
+        self.lives = START_LIVES
+        self.projectiles = EntityPool(capacity=MAX_PROJECTILES, extra=("dist",))
+        self.next_shot_time = 0
+
+        # Level
+        self.level_index = 0
+        self.enemies = EntityStore(extra=("lo", "hi"))   # patrol between lo and hi
+        self.platforms = []
+        self.collectibles = []
+        self.collected = []
+        self.portal = None
+
+        # Broad-phase grids for the static platforms/collectibles, built once
+        # per reset_level. Moving entities use the stores' batch overlap tests.
+        self.platform_grid = SpatialHash(ss(GRID_CELL))
+        self.collectible_grid = SpatialHash(ss(GRID_CELL))
+
+        # Boss; shockwave shift is how far a wave's left edge moves out per tick
+        self.boss = None
+        self.boss_hp = 0
+        self.boss_vx = 0.0
+        self.boss_vy = 0.0
+        self.boss_state = "ground"
+        self.boss_next_time = 0
+        self.hazards = EntityPool(capacity=16, extra=("speed", "shift", "life"))
+
+        # "play", "question", "game_over" or "win"
+        self.mode = "play"
+
+        # Run clock, in ticks
+        self.tick = 0
+        self.run_start_tick = None
+        self.run_finished = False
+        self.final_time = None
+
+        # Positions at the start of the current tick, for render interpolation
+        # (enemies keep theirs in the store's prev_x/prev_y columns)
+        self.prev_player_pos = None
+        self.prev_boss_pos = None
+
+        # Open question
+        self.q_kind = None
+        self.q_text = None
+        self.q_answers = []
+        self.q_correct_idx = 0
+
+    # -----------------------------------------------------------------
+    # Scaling (same rounding as sx/sy/ss in Cyber_game.py)
+    # -----------------------------------------------------------------
+    def sx(self, v): return int(v * self.Sx)
+    def sy(self, v): return int(v * self.Sy)
+    def ss(self, v): return int(v * self.S)
+
+    # -----------------------------------------------------------------
+    # Clock
+    # -----------------------------------------------------------------
+    def sim_time_ms(self):
+        return int(self.tick * 1000 // TICK_HZ)
+
+    def run_elapsed(self, alpha=0.0):
+        """Run time in seconds, measured in simulation ticks"""
+        if self.run_start_tick is None:
+            return 0.0
+        return (self.tick - self.run_start_tick + alpha) / TICK_HZ
+
+    def snapshot_positions(self):
+        self.prev_player_pos = self.player.topleft
+        self.prev_boss_pos = self.boss.topleft if self.boss else None
+        self.enemies.snapshot()
+
+    # -----------------------------------------------------------------
+    # Runs and levels
+    # -----------------------------------------------------------------
+    def reset_level(self, idx):
+        L = self.levels[idx]
+
+        self.player.topleft = L["spawn"]
+        self.player_vel_y = 0
+        self.player_on_ground = False
+        self.can_double_jump = True
+
+        self.enemies.clear()
+        for e, lo, hi in L["enemies"]:
+            self.enemies.add(e.x, e.y, e.width, e.height, vx=-self.enemy_speed, lo=lo, hi=hi)
+
+        self.platforms = [p.copy() for p in L["platforms"]]
+        self.collectibles = [c.copy() for c in L["collectibles"]]
+        self.collected = [False for _ in self.collectibles]
+
+        self.platform_grid.build(self.platforms)
+        self.collectible_grid.build(self.collectibles)
+
+        self.portal = None
+
+        cfg = L["boss_cfg"]
+        self.boss = None
+        self.boss_hp = 0
+        self.boss_vx = self.boss_vy = 0.0
+        self.boss_state = "ground"
+        self.boss_next_time = self.sim_time_ms()
+        self.hazards.clear()
+
+        if cfg:
+            size = self.ss(BOSS_SIZE)
+            bx = self.width - size - self.ss(BOSS_MARGIN)
+            by = self.ground_y - size
+            self.boss = pygame.Rect(bx, by, size, size)
+            self.boss_hp = cfg["hp"]
+
+        self.events.append(("level", idx))
+
+        # Teleports (respawn, next level) must not be interpolated
+        self.snapshot_positions()
+
+    def start_run(self, level=0):
+        """New run with a fresh clock, from level 0 or a retry from a later one"""
+        self.level_index = level
+        self.lives = START_LIVES
+        self.projectiles.clear()
+        self.run_start_tick = self.tick
+        self.run_finished = False
+        self.final_time = None
+        self.mode = "play"
+        self.reset_level(level)
+
+    def respawn(self):
+        """Game over -> try again from the current level, with a fresh clock"""
+        self.lives = START_LIVES
+        self.reset_level(self.level_index)
+        self.run_start_tick = self.tick
+        self.run_finished = False
+        self.final_time = None
+        self.mode = "play"
+
+    def finish(self, outcome):
+        self.mode = "win" if outcome == "win" else "game_over"
+        if (not self.run_finished) and self.run_start_tick is not None:
+            self.final_time = self.run_elapsed()
+            self.run_finished = True
+            self.events.append(("finished", outcome, self.final_time))
+
+    # -----------------------------------------------------------------
+    # Questions
+    # -----------------------------------------------------------------
+    def start_question(self, kind, text, answers, correct_idx):
+        self.mode = "question"
+        self.q_kind = kind
+        self.q_text = text
+        self.q_answers = answers
+        self.q_correct_idx = correct_idx
+        self.events.append(("question", kind))
+
+    def answer(self, choice_index):
+        if self.mode != "question":
+            return
+        correct = (choice_index == self.q_correct_idx)
+        self.mode = "play"
+        self.events.append(("answered", correct))
+
+        if self.q_kind == "tf":
+            # If correct: gain a life (up to MAX_LIVES)
+            if correct:
+                self.lives = min(MAX_LIVES, self.lives + 1)
+        elif self.q_kind == "portal":
+            if correct:
+                if self.level_index + 1 < len(self.levels):
+                    self.level_index += 1
+                    self.reset_level(self.level_index)
+                else:
+                    self.finish("win")
+
+    # -----------------------------------------------------------------
+    # Tick
+    # -----------------------------------------------------------------
+    def step(self, inputs):
+        """Advance one tick. inputs: dict of left/right/jump/attack booleans"""
+        if self.mode == "play":
+            self.snapshot_positions()
+            self.tick += 1
+            self.update_play(inputs)
+        elif self.mode == "question":
+            # The run clock keeps ticking while the player reads the question
+            self.tick += 1
+
+    def damage_player(self):
+        self.lives -= 1
+        self.reset_level(self.level_index)
+
+    def spawn_shockwaves(self, x_center, y_bottom):
+        speed = self.ss(SHOCKWAVE_SPEED)
+        h = self.ss(SHOCKWAVE_H)
+        self.hazards.add(x_center, y_bottom - h, 1, h, speed=speed, shift=speed, life=SHOCKWAVE_LIFE)
+        self.hazards.add(x_center, y_bottom - h, 1, h, speed=speed, shift=0, life=SHOCKWAVE_LIFE)
+
+    def update_hazards(self):
+        # Each wave grows away from the landing point (widths only grow)
+        hazards = self.hazards
+        n = hazards.n
+        hazards.x[:n] -= hazards.shift[:n]
+        hazards.w[:n] += hazards.speed[:n]
+        hazards.life[:n] -= 1
+        live = hazards.mask()
+        np.greater(hazards.life[:n], 0, out=live)
+        hazards.keep(live)
+        hazards.compact()
+
+        if hazards.overlaps(self.player).any():
+            self.damage_player()
+
+    def update_boss(self):
+        if self.boss is None:
+            return
+
+        cfg = self.levels[self.level_index]["boss_cfg"]
+        g = cfg["gravity"]
+        jump = cfg["jump_power"]
+        speed = cfg["speed_x"]
+        hover_ms = cfg["air_hover_ms"]
+        land_ms = cfg["land_cooldown_ms"]
+
+        now = self.sim_time_ms()
+        player = self.player
+
+        if self.boss_state == "ground":
+            self.boss.bottom = self.ground_y
+            self.boss_vy = 0
+            if now >= self.boss_next_time:
+                target_x = player.centerx
+                self.boss_vx = speed if self.boss.centerx < target_x else -speed
+                self.boss_vy = jump
+                self.boss_state = "takeoff"
+
+        elif self.boss_state == "takeoff":
+            self.boss_vy += g
+            self.boss_vx = speed if self.boss.centerx < player.centerx else -speed
+            self.boss.x += int(self.boss_vx)
+            self.boss.y += int(self.boss_vy)
+            if self.boss_vy >= 0:
+                self.boss_state = "hover"
+                self.boss_vx = 0
+                self.boss_vy = 0
+                self.boss_next_time = now + hover_ms
+
+        elif self.boss_state == "hover":
+            if now >= self.boss_next_time:
+                self.boss_state = "fall"
+                self.boss_vy = BOSS_FALL_SPEED * self.S
+                self.boss_vx = 0
+
+        elif self.boss_state == "fall":
+            self.boss_vy += g
+            self.boss.y += int(self.boss_vy)
+            if self.boss.bottom >= self.ground_y:
+                self.boss.bottom = self.ground_y
+                self.spawn_shockwaves(self.boss.centerx, self.boss.bottom)
+                self.boss_state = "ground"
+                self.boss_next_time = now + land_ms
+
+        # touch damage
+        if cfg["touch_damage"] and player.colliderect(self.boss):
+            self.damage_player()
+
+        # bullets vs boss
+        projectiles = self.projectiles
+        n = projectiles.n
+        projectiles.integrate()
+        projectiles.dist[:n] += self.bullet_speed
+        hit = projectiles.overlaps(self.boss)
+        self.boss_hp -= int(np.count_nonzero(hit))
+        projectiles.drop(hit)
+        in_range = projectiles.mask()
+        np.less(projectiles.dist[:n], self.attack_range, out=in_range)
+        projectiles.keep(in_range)
+        projectiles.compact()
+
+        if self.boss_hp <= 0:
+            self.hazards.clear()
+            self.finish("win")
+
+    def update_play(self, inputs):
+        player = self.player
+
+        # Horizontal movement (keyboard + controller D-pad)
+        dx = 0
+        if inputs["left"]:
+            dx = -self.move_speed
+            self.facing = -1
+        elif inputs["right"]:
+            dx = self.move_speed
+            self.facing = 1
+
+        player.x += int(dx)
+        if player.left < self.left_wall.right:
+            player.left = self.left_wall.right
+        if player.right > self.right_wall.left:
+            player.right = self.right_wall.left
+
+        # Jumping (single + double jump)
+        if inputs["jump"]:
+            if self.player_on_ground:
+                self.player_vel_y = self.jump_force
+                self.player_on_ground = False
+                self.can_double_jump = True
+            elif self.can_double_jump:
+                self.player_vel_y = self.jump_force
+                self.can_double_jump = False
+
+        # Shooting
+        now = self.sim_time_ms()
+        if inputs["attack"] and now >= self.next_shot_time:
+            # The pool holds MAX_PROJECTILES; add() refuses once it's full
+            if self.projectiles.add(player.centerx, player.centery, *self.bullet_size,
+                                    vx=self.facing * self.bullet_speed, dist=0) is not None:
+                self.next_shot_time = now + ATTACK_COOLDOWN
+
+        # --- Vertical movement & platform collisions (ground + belts) ---
+        self.player_vel_y += self.gravity
+        if self.player_vel_y > self.max_fall_speed:
+            self.player_vel_y = self.max_fall_speed
+
+        prev_bottom = player.bottom
+        prev_top = player.top
+
+        player.y += int(self.player_vel_y)
+        self.player_on_ground = False
+
+        # Ground collision
+        if player.bottom >= self.ground_y:
+            player.bottom = self.ground_y
+            self.player_vel_y = 0
+            self.player_on_ground = True
+
+        # Platforms (Level 2 belts are platforms; other levels may have none)
+        for pi in self.platform_grid.query(player):
+            p = self.platforms[pi]
+            if player.colliderect(p):
+                # Landing on top
+                if self.player_vel_y >= 0 and prev_bottom <= p.top:
+                    player.bottom = p.top
+                    self.player_vel_y = 0
+                    self.player_on_ground = True
+                # Hitting underside
+                elif self.player_vel_y < 0 and prev_top >= p.bottom:
+                    player.top = p.bottom
+                    self.player_vel_y = 0
+
+        # Enemies: patrol, turning round once they pass either end
+        enemies = self.enemies
+        enemies.integrate()
+        enemies.reverse_outside(enemies.lo, enemies.hi)
+
+        if enemies.overlaps(player).any():
+            self.damage_player()
+
+        # Projectiles
+        projectiles = self.projectiles
+        n = projectiles.n
+        projectiles.integrate()
+        projectiles.dist[:n] += self.bullet_speed
+
+        # Each bullet kills the first live enemy it touches, in order, so two
+        # bullets can't both take the same enemy
+        for p in range(n if enemies.n else 0):
+            hit = enemies.overlaps_box(projectiles.x[p], projectiles.y[p],
+                                       projectiles.w[p], projectiles.h[p])
+            j = hit.argmax()
+            if hit[j]:
+                enemies.alive[j] = False
+                projectiles.alive[p] = False
+
+        # Off screen or out of range
+        ok = projectiles.mask()
+        np.greater_equal(projectiles.x[:n], 0, out=ok)
+        projectiles.keep(ok)
+        np.less_equal(projectiles.x[:n], self.width - self.bullet_size[0], out=ok)
+        projectiles.keep(ok)
+        np.less(projectiles.dist[:n], self.attack_range, out=ok)
+        projectiles.keep(ok)
+        projectiles.compact()
+
+        # Collectibles → T/F question
+        for i in self.collectible_grid.query(player):
+            c = self.collectibles[i]
+            if (not self.collected[i]) and player.colliderect(c):
+                self.collected[i] = True
+                q, ans = self.rng.choice(TF_QUESTIONS)
+                self.start_question("tf", q, ["True", "False"], 0 if ans else 1)
+                break
+
+        # Portal logic (every level without a boss)
+        if self.levels[self.level_index]["boss_cfg"] is None:
+            if self.portal is None and all(self.collected) and not enemies.any_alive():
+                self.portal = pygame.Rect(self.width - self.ss(80), self.ground_y - self.ss(80),
+                                          self.ss(40), self.ss(80))
+
+            if self.portal and player.colliderect(self.portal):
+                q, opts, cidx = self.rng.choice(MC_QUESTIONS)
+                self.start_question("portal", q, opts, cidx)
+        else:
+            # Boss level
+            self.update_boss()
+            self.update_hazards()
+
+        # Lose condition (a boss kill this tick already ended the run)
+        if self.lives <= 0 and self.mode != "win":
+            self.finish("lose")
@@ -0,0 +1,46 @@
+"""Batched drawing of many same-coloured rectangles.
+
+pygame.draw.rect fills each rectangle in its own call, which with a
+thousand enemies on screen is most of the frame. SolidSprites keeps one
+solid surface per (colour, size) and draws a whole list of rectangles with a
+single Surface.blits() call, which covers the same pixels several times
+faster. Meant for entities whose size doesn't change (enemies, bullets).
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class SolidSprites:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+
+    def get(self, colour, size):
+        key = (tuple(colour), size)
+        surf = self._surfaces.get(key)
+        if surf is None:
+            surf = pygame.Surface(size).convert()
+            surf.fill(colour)
+            self._surfaces[key] = surf
+            if len(self._surfaces) > self.max_entries:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(key)
+        return surf
+
+    def draw(self, surface, colour, rects):
+        """Fill (x, y, w, h) rects with colour; returns the drawn Rects"""
+        if not rects:
+            return []
+        sprites = {}
+        blits = []
+        for x, y, w, h in rects:
+            sprite = sprites.get((w, h))
+            if sprite is None:
+                sprite = sprites[(w, h)] = self.get(colour, (w, h))
+            blits.append((sprite, (x, y)))
+        return surface.blits(blits)
+
+    def __len__(self):
+        return len(self._surfaces)
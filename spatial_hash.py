@@ -0,0 +1,51 @@
+"""Uniform-grid spatial hash for broad-phase collision checks.
+
+Items are stored by key (e.g. an index into the level's platform list) in
+every grid cell their rect touches. `query(rect)` returns only the keys that
+share a cell with `rect`, so pair tests stay local however big the level is.
+Works with pygame.Rect or anything with left/top/right/bottom.
+"""
+
+
+class SpatialHash:
+    def __init__(self, cell_size):
+        self.cell_size = max(1, int(cell_size))
+        self.cells = {}
+
+    def _cell_range(self, rect):
+        cs = self.cell_size
+        # right/bottom are exclusive edges, hence the -1
+        x0 = rect.left // cs
+        y0 = rect.top // cs
+        x1 = (rect.right - 1) // cs
+        y1 = (rect.bottom - 1) // cs
+        for cx in range(x0, max(x0, x1) + 1):
+            for cy in range(y0, max(y0, y1) + 1):
+                yield (cx, cy)
+
+    def clear(self):
+        self.cells.clear()
+
+    def insert(self, key, rect):
+        for cell in self._cell_range(rect):
+            bucket = self.cells.get(cell)
+            if bucket is None:
+                self.cells[cell] = [key]
+            else:
+                bucket.append(key)
+
+    def build(self, rects):
+        """Replace the contents with keys 0..n-1 for a list of rects"""
+        self.cells.clear()
+        for i, rect in enumerate(rects):
+            self.insert(i, rect)
+
+    def query(self, rect):
+        """Sorted keys that may overlap rect (narrow-phase is up to the caller)"""
+        found = set()
+        cells = self.cells
+        for cell in self._cell_range(rect):
+            bucket = cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return sorted(found)
@@ -0,0 +1,71 @@
+import importlib
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# The modules live at the top of the repo, not in a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """server.py on a fresh database (it reads LEADERBOARD_DB at import)"""
+    monkeypatch.delenv("RENDER", raising=False)
+    monkeypatch.setenv("LEADERBOARD_DB", str(tmp_path / "leaderboard.db"))
+    monkeypatch.setenv("VERIFY_WORKERS", "1")
+    module = importlib.reload(sys.modules["server"]) if "server" in sys.modules \
+        else importlib.import_module("server")
+    yield module
+    module.verifier.shutdown()
+
+
+@pytest.fixture
+def live_server(server):
+    """(base_url, server module) with the app served on a free local port"""
+    from werkzeug.serving import make_server
+    http = make_server("127.0.0.1", 0, server.app, threaded=True)
+    thread = threading.Thread(target=http.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{http.server_port}", server
+    http.shutdown()
+
+
+def _record_run(size=(1000, 600), start_level=0, max_ticks=20000):
+    """Record one run with scripted input until it finishes.
+
+    Returns (replay bytes, outcome, run ticks); outcome is None if the run
+    was still going after max_ticks.
+    """
+    import random
+
+    import headless
+    from replay import ReplayRecorder
+    from simulation import GameState
+
+    for seed in range(1, 20):
+        rng = random.Random(seed)
+        sim = GameState(size, seed=seed, level_cache=False)
+        recorder = ReplayRecorder(sim)
+        recorder.start_run(start_level)
+        sim.events.clear()
+        for tick in range(max_ticks):
+            if sim.mode == "question":
+                recorder.answer(headless.choose_answer(sim, "wrong", rng))
+            else:
+                recorder.step(headless.policy_random(tick, rng))
+            finished = [ev for ev in sim.events if ev[0] == "finished"]
+            sim.events.clear()
+            if finished:
+                return recorder.to_bytes(), finished[0][1], sim.tick - sim.run_start_tick
+    return recorder.to_bytes(), None, sim.tick - sim.run_start_tick
+
+
+@pytest.fixture
+def record_run():
+    return _record_run
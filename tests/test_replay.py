@@ -0,0 +1,85 @@
+import struct
+import zlib
+
+import pytest
+
+import replay
+from replay import (HEADER, MAGIC, OP_ANSWER, OP_FINISH, OP_INPUT, OP_LEVEL, Replay, ReplayError,
+                    pack_inputs, parse_ops, play)
+from simulation import TICK_HZ
+
+
+def test_round_trip_reproduces_the_run(record_run):
+    data, outcome, ticks = record_run()
+    assert outcome is not None
+
+    loaded = Replay.from_bytes(data)
+    assert loaded.size == (1000, 600)
+    result = play(loaded, level_cache=False)
+    assert result["ok"], result["error"]
+    assert result["runs"] == [{"outcome": outcome, "time_s": ticks / TICK_HZ}]
+
+
+def test_replays_are_small(record_run):
+    data, _, ticks = record_run()
+    # Runs of identical input collapse to one op
+    assert len(data) < ticks
+
+
+def test_retry_from_a_later_level_round_trips(record_run):
+    data, _, _ = record_run(start_level=2, max_ticks=600)
+    loaded = Replay.from_bytes(data)
+    assert loaded.start_level == 2
+    result = play(loaded, level_cache=False)
+    assert result["ok"], result["error"]
+    assert result["levels"][0] == 2
+
+
+def test_version_1_replays_still_load():
+    ops = bytes([OP_INPUT | pack_inputs({"left": False, "right": True, "jump": False,
+                                         "attack": False}), 10])
+    data = HEADER.pack(MAGIC, 1, 800, 500, 7, 0) + zlib.compress(ops)
+    loaded = Replay.from_bytes(data)
+    assert (loaded.start_level, loaded.seed, loaded.ops) == (0, 7, ops)
+    assert play(loaded, level_cache=False)["ticks"] == 10
+
+
+def test_fingerprint_ignores_packing():
+    bits = OP_INPUT | 0b0010
+    one_run = Replay((800, 500), 7, 0, bytes([bits, 20, OP_ANSWER | 1]))
+    split = Replay((800, 500), 7, 123, bytes([bits, 5, bits, 0x8F, 0x00, OP_ANSWER | 1]))
+    assert one_run.fingerprint() == split.fingerprint()
+    assert Replay((800, 500), 8, 0, one_run.ops).fingerprint() != one_run.fingerprint()
+    assert Replay((800, 500), 7, 0, one_run.ops, start_level=1).fingerprint() \
+        != one_run.fingerprint()
+
+
+def test_parse_ops_decodes_varints():
+    ops = bytes([OP_LEVEL, 0, OP_INPUT | 0b0010, 0xAC, 0x02, OP_FINISH | 1, 0x90, 0x03])
+    assert list(parse_ops(ops)) == [(OP_LEVEL, 0, 0), (OP_INPUT, 2, 300), (OP_FINISH, 1, 400)]
+
+
+@pytest.mark.parametrize("ops, message", [
+    (bytes([OP_INPUT, 0]), "zero ticks"),
+    (bytes([0x70]), "unknown op"),
+    (bytes([OP_INPUT, 0x80]), "truncated"),
+    (bytes([OP_INPUT] + [0xFF] * 8 + [0x01]), "varint too long"),
+])
+def test_parse_ops_rejects_what_a_recorder_cannot_write(ops, message):
+    with pytest.raises(ReplayError, match=message):
+        list(parse_ops(ops))
+
+
+def test_header_is_checked():
+    good = HEADER.pack(MAGIC, replay.VERSION, 800, 500, 1, 0) + b"\0" + zlib.compress(b"")
+    assert Replay.from_bytes(good).size == (800, 500)
+    with pytest.raises(ReplayError, match="too short"):
+        Replay.from_bytes(good[:10])
+    with pytest.raises(ReplayError, match="bad magic"):
+        Replay.from_bytes(b"NOTAREPL" + good[8:])
+    with pytest.raises(ReplayError, match="version"):
+        Replay.from_bytes(good[:8] + bytes([99]) + good[9:])
+    huge = bytearray(good)
+    struct.pack_into("<HH", huge, 9, 60000, 60000)
+    with pytest.raises(ReplayError, match="screen size"):
+        Replay.from_bytes(bytes(huge))
@@ -0,0 +1,175 @@
+import base64
+import re
+import sqlite3
+import time
+import zlib
+
+import pytest
+
+import replay
+from level_data import LevelSet
+from replay import HEADER, MAGIC, OP_ANSWER, OP_INPUT
+from replay_verifier import (MAX_REPLAY_BYTES, MAX_REPLAY_TICKS, PENDING, REJECTED, VERIFIED,
+                             ReplayVerifier, verify_replay)
+from simulation import TICK_HZ
+
+
+def input_op(ticks):
+    op = bytearray([OP_INPUT])
+    replay._put_varint(op, ticks)
+    return bytes(op)
+
+
+def make_replay(ops, size=(800, 500), start_level=0, compress=zlib.compress):
+    header = HEADER.pack(MAGIC, replay.VERSION, size[0], size[1], 1, 0)
+    return header + bytes([start_level]) + compress(ops)
+
+
+@pytest.fixture
+def finished_run(record_run):
+    data, outcome, ticks = record_run()
+    assert outcome is not None
+    return data, outcome, ticks / TICK_HZ
+
+
+def test_honest_claim_is_verified(finished_run):
+    data, outcome, time_s = finished_run
+    status, detail = verify_replay(data, time_s, outcome)
+    assert status == VERIFIED, detail
+
+
+def test_wrong_claims_are_rejected(finished_run):
+    data, outcome, time_s = finished_run
+    assert verify_replay(data, time_s - 1, outcome)[0] == REJECTED
+    other = "win" if outcome == "lose" else "lose"
+    assert verify_replay(data, time_s, other)[0] == REJECTED
+
+
+def test_verifying_writes_no_level_cache(finished_run, monkeypatch):
+    def no_disk(self, path):
+        raise AssertionError("verification touched the level cache")
+    monkeypatch.setattr(LevelSet, "_cache_path", no_disk)
+    data, outcome, time_s = finished_run
+    assert verify_replay(data, time_s, outcome)[0] == VERIFIED
+
+
+def test_decompression_bomb_is_rejected_quickly():
+    bomb = make_replay(bytes(200 * 1024 * 1024), compress=lambda b: zlib.compress(b, 9))
+    assert len(bomb) <= MAX_REPLAY_BYTES
+    start = time.perf_counter()
+    status, detail = verify_replay(bomb, 10, "win")
+    assert status == REJECTED and "exceed" in detail
+    assert time.perf_counter() - start < 2
+
+
+@pytest.mark.parametrize("ops, size, start_level, message", [
+    (bytes([OP_INPUT, 0]) * 1000, (800, 500), 0, "zero ticks"),
+    (input_op(MAX_REPLAY_TICKS + 1), (800, 500), 0, "longer than allowed"),
+    (bytes([OP_INPUT, 1]) + bytes([OP_ANSWER]) * 100, (800, 500), 0, "more ops"),
+    (bytes([OP_INPUT, 1]), (800, 500), 200, "level 200"),
+    (bytes([OP_INPUT, 1]), (60000, 60000), 0, "screen size"),
+    (bytes([0x70]), (800, 500), 0, "unknown op"),
+])
+def test_malformed_replays_are_rejected(ops, size, start_level, message):
+    status, detail = verify_replay(make_replay(ops, size, start_level), 10, "win")
+    assert status == REJECTED
+    assert message in detail
+
+
+def test_tick_limit_is_checked_before_simulating():
+    # Everything up to the limit, then one tick too many
+    ops = input_op(MAX_REPLAY_TICKS) + input_op(1)
+    start = time.perf_counter()
+    assert verify_replay(make_replay(ops), 10, "win")[0] == REJECTED
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.parametrize("data", [b"", b"garbage", MAGIC + b"\x02" + b"\0" * 30,
+                                  make_replay(b"")[:-2]])
+def test_garbage_is_rejected(data):
+    assert verify_replay(data, 10, "win")[0] == REJECTED
+
+
+# ---------------------------------------------------------------------
+# Through the server
+# ---------------------------------------------------------------------
+def verification(server, name):
+    conn = sqlite3.connect(server.DB_PATH)
+    row = conn.execute("SELECT verification FROM scores WHERE name = ?", (name,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def wait_for_verification(server, name, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = verification(server, name)
+        if status != PENDING:
+            return status
+        time.sleep(0.1)
+    return PENDING
+
+
+def submit(client, name, data, outcome, time_s):
+    return client.post("/submit_result", json={
+        "submission_id": name, "name": name, "time_s": time_s, "outcome": outcome,
+        "replay": base64.b64encode(data).decode("ascii")})
+
+
+def test_server_verifies_and_refuses_reused_replays(server, finished_run):
+    data, outcome, time_s = finished_run
+    client = server.app.test_client()
+
+    resp = submit(client, "Ada", data, outcome, time_s)
+    assert resp.get_json()["data"]["verification"] == PENDING
+    assert wait_for_verification(server, "Ada") == VERIFIED
+
+    # A retry of the same submission reports what was stored the first time
+    resp = submit(client, "Ada", data, outcome, time_s)
+    assert resp.get_json()["data"]["verification"] == VERIFIED
+
+    # Same replay, same claim, different player: not re-simulated, rejected
+    resp = submit(client, "Mallory", data, outcome, time_s)
+    assert resp.get_json()["data"]["verification"] == REJECTED
+    assert verification(server, "Mallory") == REJECTED
+
+    # The verified-only view's stats count only the verified run
+    page = client.get("/?verified=1").get_data(as_text=True)
+    assert re.findall(r'stat-value">([^<]*)<', page)[0] == "1"
+    page = client.get("/").get_data(as_text=True)
+    assert re.findall(r'stat-value">([^<]*)<', page)[0] == "2"
+
+
+def repack_v1(data):
+    """The same run with a version 1 header and fast compression"""
+    magic, _, w, h, seed, crc = HEADER.unpack_from(data)
+    ops = replay.Replay.from_bytes(data).ops
+    return HEADER.pack(magic, 1, w, h, seed, crc) + zlib.compress(ops, 1)
+
+
+@pytest.mark.parametrize("repack", [
+    lambda data: data[:HEADER.size + 1] + zlib.compress(replay.Replay.from_bytes(data).ops, 1),
+    repack_v1,
+], ids=["recompressed", "version-1-header"])
+def test_repacked_replay_counts_as_reused(server, finished_run, repack):
+    data, outcome, time_s = finished_run
+    copy = repack(data)
+    assert copy != data
+    client = server.app.test_client()
+
+    assert submit(client, "Ada", data, outcome, time_s).status_code == 200
+    assert submit(client, "Mallory", copy, outcome, time_s).status_code == 200
+    assert verification(server, "Mallory") == REJECTED
+    assert wait_for_verification(server, "Ada") == VERIFIED
+
+
+def test_unreadable_replay_is_rejected_on_submit(server):
+    client = server.app.test_client()
+    assert submit(client, "Eve", make_replay(b"\xff"), "win", 5.0).status_code == 200
+    assert verification(server, "Eve") == REJECTED
+
+
+def test_pending_replays_are_requeued_by_one_process_only(server):
+    # server.py's import already claimed the requeue for this database
+    other_worker = ReplayVerifier(server.DB_PATH, workers=1)
+    assert other_worker.requeue_pending() == 0
@@ -0,0 +1,78 @@
+import json
+import time
+
+import pytest
+
+from score_client import STATUS_REJECTED, STATUS_SAVED, ScoreSubmitter
+
+DEAD_URL = "http://127.0.0.1:9"   # connection refused straight away
+
+
+def wait_for(condition, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def spooled(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+def test_submit_spools_before_returning(tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    submitter = ScoreSubmitter(DEAD_URL, spool_path=spool)
+    submitter.submit("Ada", "", 31.25, "win")
+    # On disk already, whatever the worker thread is doing
+    entries = spooled(spool)
+    assert [(e["name"], e["time_s"]) for e in entries] == [("Ada", 31.25)]
+    assert entries[0]["submission_id"]
+
+
+def test_spool_survives_restart_and_drains_once(tmp_path, live_server):
+    base_url, server = live_server
+    spool = tmp_path / "spool.jsonl"
+
+    offline = ScoreSubmitter(DEAD_URL, spool_path=spool)
+    for i in range(7):
+        offline.submit(f"Kiosk{i}", "", 20 + i, "lose")
+    assert offline.pending() == 7
+
+    # Next session, server reachable: the old spool is sent on its own
+    restarted = ScoreSubmitter(base_url, spool_path=spool)
+    assert wait_for(lambda: restarted.pending() == 0)
+
+    rows = server.get_scores_by_type("game")
+    assert sorted(r[0] for r in rows) == [f"Kiosk{i}" for i in range(7)]
+
+
+def test_bad_spooled_result_does_not_sink_the_batch(tmp_path, live_server):
+    base_url, server = live_server
+    spool = tmp_path / "spool.jsonl"
+    with open(spool, "w", encoding="utf-8") as f:
+        for i, t in enumerate([12.0, "nan", 14.0]):
+            f.write(json.dumps({"submission_id": f"s{i}", "name": f"P{i}", "email": "",
+                                "time_s": t, "outcome": "win"}) + "\n")
+
+    submitter = ScoreSubmitter(base_url, spool_path=spool)
+    assert wait_for(lambda: submitter.pending() == 0)
+    assert sorted(r[0] for r in server.get_scores_by_type("game")) == ["P0", "P2"]
+
+
+def test_rejected_result_is_not_reported_as_saved(tmp_path, live_server):
+    base_url, server = live_server
+    submitter = ScoreSubmitter(base_url, spool_path=tmp_path / "spool.jsonl")
+    submitter.submit("Ada", "", -1.0, "win")
+    assert wait_for(lambda: submitter.status == STATUS_REJECTED)
+    assert submitter.pending() == 0
+
+    submitter.submit("Ada", "", 31.25, "win")
+    assert wait_for(lambda: submitter.status == STATUS_SAVED)
+
+
+@pytest.mark.parametrize("board", ["", "two words", "../main", "x" * 41])
+def test_invalid_board_is_refused(tmp_path, board):
+    with pytest.raises(ValueError):
+        ScoreSubmitter(DEAD_URL, board, spool_path=tmp_path / "spool.jsonl")
@@ -0,0 +1,87 @@
+import bisect
+import json
+import math
+import random
+
+import pytest
+
+from score_stats import HISTOGRAM_EDGES, ScoreStats, ScoreSummary, TDigest
+
+
+def rank_error(values, estimate, q):
+    """How far (as a fraction of all values) estimate's rank is from q"""
+    lo = bisect.bisect_left(values, estimate) / len(values)
+    hi = bisect.bisect_right(values, estimate) / len(values)
+    return 0.0 if lo <= q <= hi else min(abs(lo - q), abs(hi - q))
+
+
+@pytest.mark.parametrize("dist", ["uniform", "lognormal"])
+def test_quantiles_are_accurate(dist):
+    rng = random.Random(1)
+    if dist == "uniform":
+        values = [rng.uniform(5, 300) for _ in range(20000)]
+    else:
+        values = [rng.lognormvariate(4, 0.6) for _ in range(20000)]
+    digest = TDigest()
+    for v in values:
+        digest.add(v)
+    values.sort()
+
+    assert len(digest.means) <= 2 * digest.compression
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        assert rank_error(values, digest.quantile(q), q) < 0.01, q
+
+
+def test_merge_matches_single_digest():
+    rng = random.Random(2)
+    values = [rng.uniform(0, 100) for _ in range(5000)]
+    whole, left, right = TDigest(), TDigest(), TDigest()
+    for i, v in enumerate(values):
+        whole.add(v)
+        (left if i % 2 else right).add(v)
+    left.merge(right)
+    assert left.total == whole.total
+    for q in (0.1, 0.5, 0.9):
+        assert left.quantile(q) == pytest.approx(whole.quantile(q), rel=0.02)
+
+
+def test_empty_and_single_value():
+    digest = TDigest()
+    assert digest.quantile(0.5) is None
+    digest.add(42)
+    assert digest.quantile(0.01) == digest.quantile(0.99) == 42
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+def test_non_finite_values_are_rejected(value):
+    with pytest.raises(ValueError):
+        TDigest().add(value)
+    summary = ScoreSummary()
+    summary.add(10)
+    with pytest.raises(ValueError):
+        summary.add(value)
+    # The summary is untouched and still serialises as strict JSON
+    assert summary.count == 1
+    json.dumps(summary.to_dict(), allow_nan=False)
+
+
+def test_summary_counts_and_histogram():
+    summary = ScoreSummary()
+    for t in (5, 15, 15, 700):
+        summary.add(t)
+    d = summary.to_dict()
+    assert (d["count"], d["best"], d["worst"], d["mean"]) == (4, 5, 700, 183.75)
+    assert len(d["histogram"]) == len(HISTOGRAM_EDGES) + 1
+    assert [b["count"] for b in d["histogram"]][:2] == [1, 2]
+    assert d["histogram"][-1] == {"range": "600+", "count": 1}
+
+
+def test_load_skips_unusable_rows():
+    stats = ScoreStats()
+    skipped = stats.load([("game", "win", 30.0), ("game", "win", None),
+                          ("game", "lose", float("nan")), ("test", "test", "12.5")])
+    assert skipped == 2
+    data = stats.to_dict()
+    assert data["game"]["all"]["count"] == 1
+    assert data["test"]["all"]["p50"] == 12.5
+    assert not math.isnan(data["game"]["all"]["mean"])
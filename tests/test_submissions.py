@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+
+def count_rows(server, board=None):
+    conn = sqlite3.connect(server.DB_PATH)
+    if board is None:
+        n = conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+    else:
+        n = conn.execute("SELECT COUNT(*) FROM scores WHERE board = ?", (board,)).fetchone()[0]
+    conn.close()
+    return n
+
+
+def result(submission_id, time_s=42.5, name="Ada"):
+    return {"submission_id": submission_id, "name": name, "email": "", "time_s": time_s,
+            "outcome": "win"}
+
+
+def test_retried_submission_is_stored_once(server):
+    client = server.app.test_client()
+    for _ in range(3):
+        resp = client.post("/submit_result", json=result("abc123"))
+        assert resp.status_code == 200
+    assert count_rows(server) == 1
+    assert server.read_board_stats("main").summary("game").count == 1
+
+
+def test_results_without_submission_id_are_all_kept(server):
+    client = server.app.test_client()
+    for _ in range(2):
+        client.post("/submit_result", json={"name": "Old client", "time_s": 30, "outcome": "lose"})
+    assert count_rows(server) == 2
+
+
+def test_batch_is_idempotent_across_retries(server):
+    client = server.app.test_client()
+    batch = {"results": [result(f"id{i}", 10 + i) for i in range(5)]}
+    first = client.post("/b/class-7/submit_results", json=batch).get_json()
+    again = client.post("/b/class-7/submit_results", json=batch).get_json()
+    assert (first["added"], again["added"]) == (5, 0)
+    assert count_rows(server, "class-7") == 5
+
+
+@pytest.mark.parametrize("time_s", ["nan", "inf", -3, 0, "soon", None, True])
+def test_bad_times_are_rejected_not_dropped(server, time_s):
+    resp = server.app.test_client().post("/submit_result", json=result("bad", time_s))
+    assert resp.status_code == 400
+    assert count_rows(server) == 0
+
+
+def test_batch_rejects_only_the_bad_items(server):
+    items = [result("a", 20), result("b", "nan"), "not an object", result("c", 25)]
+    resp = server.app.test_client().post("/submit_results", json={"results": items})
+    data = resp.get_json()
+    assert resp.status_code == 200
+    assert data["added"] == 2
+    assert [r["index"] for r in data["rejected"]] == [1, 2]
+    assert count_rows(server) == 2
+
+
+@pytest.mark.parametrize("submission_id", [["a"], {"id": 1}, 7, "", "x" * 65])
+def test_unusable_submission_ids_are_rejected(server, submission_id):
+    client = server.app.test_client()
+    assert client.post("/submit_result", json=result(submission_id)).status_code == 400
+
+    items = [result("good"), result(submission_id)]
+    resp = client.post("/submit_results", json={"results": items})
+    data = resp.get_json()
+    assert resp.status_code == 200
+    assert data["added"] == 1
+    assert [r["index"] for r in data["rejected"]] == [1]
+    assert count_rows(server) == 1
+
+
+def test_other_insert_failures_are_not_silently_ignored(server):
+    # Only a duplicate submission_id may be skipped; a NOT NULL violation
+    # must fail the call so the client keeps the result
+    entry = dict(result("x"), name=None, score_type="game")
+    assert server.add_scores([entry]) is None
+    assert count_rows(server) == 0
@@ -0,0 +1,65 @@
+"""Cached text rendering for the game HUD, menus and panels.
+
+Font.render() rasterises the string every call. Most labels never change, so
+TextCache keeps rendered surfaces keyed by (font, text, colour) and evicts the
+least recently used ones. DigitAtlas covers the one label that changes every
+frame, the run timer, by composing it from pre-rendered fixed-width glyphs.
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, colour, antialias=True):
+        key = (font, text, tuple(colour), antialias)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, antialias, colour)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+class DigitAtlas:
+    """Fixed-width glyphs for numbers, so "12.34s" never re-rasterises"""
+
+    CHARS = "0123456789.:-s "
+
+    def __init__(self, font, colour, antialias=True):
+        self.glyphs = {ch: font.render(ch, antialias, colour) for ch in self.CHARS}
+        # Digits share one advance so the timer doesn't jitter as it counts
+        self.advance = max(self.glyphs[d].get_width() for d in "0123456789")
+        self.height = max(g.get_height() for g in self.glyphs.values())
+
+    def width(self, text):
+        return self.advance * len(text)
+
+    def blit(self, surface, text, pos):
+        """Draw text at pos; returns the covered Rect"""
+        x, y = pos
+        for ch in text:
+            glyph = self.glyphs.get(ch)
+            if glyph is not None:
+                # Centre narrow glyphs ('.', ':') inside their cell
+                surface.blit(glyph, (x + (self.advance - glyph.get_width()) // 2, y))
+            x += self.advance
+        return pygame.Rect(pos[0], y, x - pos[0], self.height)